@@ -1,436 +1,782 @@
 # binary_parsers.py
 
-class BinaryPaq2018Helper:
-    BITVECTOR_BYTE_SIZE = 4
-    NUMBER_OF_BYTES = 12  # Each item uses 12 bytes (3 * 4 bytes)
-    CHAR_SIMPLIFY_OFFSET = 64  # For character conversion (A=65 in ASCII)
+import hashlib
+import multiprocessing
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import repeat
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from metrics import metrics
+
+
+class DecodedColumns(dict):
+    # Column dictionary returned by the batch decoders. Lazy columns are only
+    # built the first time they are read and are then stored like any other column.
+    # Builders must not reference the helper: cached columns would keep its answers buffer alive.
+
+    def __init__(self, columns, lazy_columns=None):
+        super().__init__(columns)
+        self.lazy_columns = dict(lazy_columns or {})
+        self.on_build = None  # Called with the size of each lazy column once it is built
+
+    def __missing__(self, name):
+        build = self.lazy_columns.get(name)
+        if build is None:
+            raise KeyError(name)
+        # Cached columns are shared between sessions: a concurrent read may build the column
+        # twice, but always ends with the same value stored
+        value = build(self)
+        self[name] = value
+        if self.lazy_columns.pop(name, None) is not None and self.on_build is not None:
+            self.on_build(get_values_nbytes(value))
+        return value
+
+    def __contains__(self, name):
+        return super().__contains__(name) or name in self.lazy_columns
+
+
+# Default byte budget of the process-wide decode cache
+DECODE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def get_values_nbytes(values):
+    # Memory held by one column, including the strings behind object and categorical columns
+    if isinstance(values, pd.Categorical):
+        return int(values.memory_usage(deep=True))
+    if isinstance(values, np.ndarray) and values.dtype == object:
+        # Object columns often repeat one string per distinct value; count each object once
+        distinct = {id(value): value for value in values.ravel().tolist()}
+        return values.nbytes + sum(sys.getsizeof(value) for value in distinct.values())
+    return getattr(values, "nbytes", 0)
+
+
+def get_columns_nbytes(columns):
+    # Approximate memory held by a (nested) column dictionary
+    total = 0
+    for values in columns.values():
+        if isinstance(values, dict):
+            total += get_columns_nbytes(values)
+        else:
+            total += get_values_nbytes(values)
+    return total
+
+
+def freeze_columns(columns):
+    # Cached columns are shared by every session, so make them read-only
+    for values in columns.values():
+        if isinstance(values, dict):
+            freeze_columns(values)
+        elif isinstance(values, np.ndarray):
+            values.flags.writeable = False
+
+
+class DecodeCache:
+    # Process-wide cache of decoded answer blobs. Keys are a hash of the blob bytes plus the
+    # format, so identical blobs are decoded once no matter which session or helper asks.
+    # The least recently used entries are evicted once the cached columns exceed max_bytes.
+
+    def __init__(self, max_bytes=DECODE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def make_key(self, format_key, answers):
+        return format_key, hashlib.blake2b(answers, digest_size=16).digest()
+
+    def get_or_decode(self, format_key, answers, decode):
+        key = self.make_key(format_key, answers)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Decode outside the lock so other sessions are not blocked
+        columns = decode()
+        self.put(key, columns)
+        return columns
+
+    def put(self, key, columns):
+        nbytes = get_columns_nbytes(columns)
+        if nbytes > self.max_bytes:
+            return  # Never cache an entry that would evict everything else
+
+        freeze_columns(columns)
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = (columns, nbytes)
+            self.total_bytes += nbytes
+            # Lazy columns built later count toward the budget as well
+            if isinstance(columns, DecodedColumns):
+                columns.on_build = partial(self.add_bytes, key)
+            self.evict()
+
+    def add_bytes(self, key, nbytes):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return  # Already evicted
+            self.entries[key] = (entry[0], entry[1] + nbytes)
+            self.total_bytes += nbytes
+            self.evict()
+
+    def evict(self):
+        # Drop the least recently used entries until the cache fits its budget; call with the lock held
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Evictions": self.evictions,
+                "Entries": len(self.entries),
+                "Bytes": self.total_bytes,
+                "MaxBytes": self.max_bytes
+            }
 
-    def __init__(self, paq2018_answers):
-        self.paq2018_answers = paq2018_answers
-        self.total_items = int(len(self.paq2018_answers) / self.NUMBER_OF_BYTES)
+
+# Shared by every session of the Streamlit process
+decode_cache = DecodeCache()
+
+
+# One field of an item layout: the word it starts in, its bit offset within that word
+# and its width in bits. Fields with count > 1 hold several values, each `stride` bits apart
+# (defaults to the width). A field may run over into the next word.
+BitField = namedtuple("BitField", ["name", "word", "offset", "width", "count", "stride", "dtype"],
+                      defaults=(1, None, None))
+
+# The layout of one item: item and word size in bytes, the byte order of each word
+# ('little' or 'big') and the bit order used for offsets ('lsb' counts from the least
+# significant bit, 'msb' from the most significant bit, like a binary string).
+BitLayout = namedtuple("BitLayout", ["name", "item_size", "word_size", "byteorder", "bit_order", "fields"])
+
+
+def get_field_parts(word, offset, width, word_bits, bit_order):
+    # Return the (word, right shift, left shift) parts that are OR-ed together to build a value
+    if bit_order == 'lsb':
+        if offset + width <= word_bits:
+            return [(word, offset, 0)]
+        return [(word, offset, 0), (word + 1, 0, word_bits - offset)]
+
+    shift = word_bits - offset - width
+    if shift >= 0:
+        return [(word, shift, 0)]
+    spill = -shift
+    return [(word, 0, spill), (word + 1, word_bits - spill, 0)]
+
+
+@lru_cache(maxsize=None)
+def compile_layout(layout):
+    # Turn a layout into an extractor once per format. The extractor decodes whole columns:
+    # the work per call is a handful of array operations per field, independent of the item count.
+    word_bits = layout.word_size * 8
+    words_per_item = layout.item_size // layout.word_size
+    native_dtype = np.dtype(f"u{layout.word_size}")
+    word_dtype = native_dtype.newbyteorder('<' if layout.byteorder == 'little' else '>')
+    scalar = native_dtype.type
+
+    plans = []
+    for field in layout.fields:
+        if field.width > word_bits:
+            raise ValueError(f"Field {field.name} in layout {layout.name} is wider than a word.")
+
+        width_dtype = np.min_scalar_type((1 << field.width) - 1)
+        dtype = np.dtype(field.dtype) if field.dtype is not None else width_dtype
+        stride = field.stride or field.width
+
+        value_parts = []
+        for idx in range(field.count):
+            word, offset = divmod(field.word * word_bits + field.offset + idx * stride, word_bits)
+            parts = get_field_parts(word, offset, field.width, word_bits, layout.bit_order)
+            if parts[-1][0] >= words_per_item:
+                raise ValueError(f"Field {field.name} in layout {layout.name} runs past the end of the item.")
+            value_parts.append([(part_word, scalar(right), scalar(left)) for part_word, right, left in parts])
+
+        plans.append((field.name, field.count, value_parts, scalar((1 << field.width) - 1), dtype))
+
+    def extract(buffer, item_count, first_item=0):
+        words = np.frombuffer(buffer, dtype=word_dtype, count=item_count * words_per_item,
+                              offset=first_item * layout.item_size)
+        words = words.astype(native_dtype, copy=False).reshape(-1, words_per_item)
+
+        fields = {}
+        for name, count, value_parts, mask, dtype in plans:
+            values = []
+            for parts in value_parts:
+                value = None
+                for word, right, left in parts:
+                    part = words[:, word]
+                    if right:
+                        part = part >> right
+                    if left:
+                        part = part << left
+                    value = part if value is None else value | part
+                values.append((value & mask).astype(dtype))
+            fields[name] = values[0] if count == 1 else np.stack(values, axis=1)
+        return fields
+
+    return extract
+
+
+class BinaryLayoutHelper:
+    # Batch decoding shared by the helpers below. Each helper describes its item format
+    # in LAYOUT and overrides is_terminator and build_columns where the format needs it.
+    LAYOUT = None
+    INDEX_NAME = "ItemIndex"
+    ITER_CHUNK_ITEMS = 65536  # Number of items decoded per step by iter_items
+
+    def __init__(self, answers):
+        # Keep a flat byte view of the answers, so bytes, bytearray, memoryview and mmap
+        # inputs are all sliced per item without copying
+        self.answers = memoryview(answers).cast('B')
+        self.total_items = int(len(self.answers) / self.NUMBER_OF_BYTES)
+        self._columns = None
+        self._terminators = None
+
+    @property
+    def NUMBER_OF_BYTES(self):
+        # Number of bytes per item, as described by the layout
+        return self.LAYOUT.item_size
 
     def parse_item(self, item_index):
         if item_index < 1 or item_index > self.total_items:
-            raise ValueError(f"Item index {item_index} out of range.")
-
-        # Calculate offset
-        offset = (item_index - 1) * self.NUMBER_OF_BYTES
-        item_bytes = self.paq2018_answers[offset:offset + self.NUMBER_OF_BYTES]
-        if len(item_bytes) < self.NUMBER_OF_BYTES:
-            raise ValueError(f"Not enough data for item index {item_index}.")
-
-        # Read the three 4-byte integers
-        left_statement_int = int.from_bytes(item_bytes[0:4], byteorder='little')
-        right_statement_int = int.from_bytes(item_bytes[4:8], byteorder='little')
-        value_int = int.from_bytes(item_bytes[8:12], byteorder='little')
-
-        # Parse statements and value
-        code_left_statement = self.get_statement_from_int(left_statement_int)
-        code_right_statement = self.get_statement_from_int(right_statement_int)
-        is_inversed = bool((value_int >> 0) & 0x1)  # inversedBitSector (1 bit)
-        normative_value = (value_int >> 1) & 0x7  # answerBitSector (3 bits)
-
-        return {
-            "ItemIndex": item_index,
-            "LeftStatement": code_left_statement,
-            "RightStatement": code_right_statement,
-            "IsInversed": is_inversed,
-            "Answer": normative_value
-        }
+            raise ValueError(f"{self.INDEX_NAME.replace('Index', ' index')} {item_index} out of range.")
 
-    def get_statement_from_int(self, value_int):
-        # Extract bits
-        nonNumeric1 = (value_int >> 0) & 0x1F  # bits 0-4 (5 bits)
-        nonNumeric2 = (value_int >> 5) & 0x1F  # bits 5-9 (5 bits)
-        nonNumeric3 = (value_int >> 10) & 0x1F  # bits 10-14 (5 bits)
-        numeric = (value_int >> 15) & 0x7F  # bits 15-21 (7 bits)
-        nonNumeric1Part2 = (value_int >> 22) & 0x1F  # bits 22-26 (5 bits)
+        # View one row of the decoded columns, so single items use the same layout as the batch decoders
+        columns = self.decode_columns()
+        row = item_index - 1
 
-        # Convert to characters
-        chars = []
-        chars.append(chr(nonNumeric1 + self.CHAR_SIMPLIFY_OFFSET))
-        chars.append(chr(nonNumeric2 + self.CHAR_SIMPLIFY_OFFSET))
-        chars.append(chr(nonNumeric3 + self.CHAR_SIMPLIFY_OFFSET))
-
-        nonNumericCodePart = ''.join(chars)
-        numericCodePart = f"{numeric:02d}"
+        if self._terminators is not None and self._terminators[row]:
+            return None  # Termination condition
 
-        if nonNumeric1Part2 != 0:
-            # There's a second non-numeric part
-            chars2 = []
-            chars2.append(chr(nonNumeric1Part2 + self.CHAR_SIMPLIFY_OFFSET))
-            nonNumericCodePart2 = ''.join(chars2)
-            return f"{nonNumericCodePart}_{numericCodePart}_{nonNumericCodePart2}"
+        return self.get_item(columns, row)
+
+    def decode_columns(self):
+        # Decode every item once, terminators included, and keep the result for parse_item
+        if self._columns is None:
+            fields = self.decode_fields()
+            self._terminators = self.is_terminator(fields)
+            self._columns = self.build_columns(fields, np.arange(1, self.total_items + 1))
+        return self._columns
+
+    def parse_all(self, use_cache=True):
+        # Decoded columns are served from the process-wide decode cache when possible
+        if use_cache:
+            return decode_cache.get_or_decode(self.get_format_key(), self.answers, self.timed_decode_all)
+        return self.timed_decode_all()
+
+    def timed_decode_all(self):
+        # Cache hits are not decodes, so only the actual decoding is recorded
+        with metrics.timer(f"decode.{self.LAYOUT.name}.seconds"):
+            return self.decode_all()
+
+    def get_format_key(self):
+        return self.LAYOUT.name
+
+    def decode_all(self):
+        fields = self.decode_fields()
+
+        # Stop at the termination condition, if the format has one
+        item_count = self.count_items(fields)
+        fields = {name: values[:item_count] for name, values in fields.items()}
+
+        return self.build_columns(fields, np.arange(1, item_count + 1))
+
+    def iter_items(self, chunk_items=None):
+        # Stream the decoded items until the termination condition. The answers are decoded
+        # chunk by chunk, so memory use depends on the chunk size and not on the blob size.
+        chunk_items = chunk_items or self.ITER_CHUNK_ITEMS
+        extract = compile_layout(self.LAYOUT)
+
+        for first_item in range(0, self.total_items, chunk_items):
+            item_count = min(chunk_items, self.total_items - first_item)
+            fields = extract(self.answers, item_count, first_item)
+
+            valid_count = self.count_items(fields)
+            fields = {name: values[:valid_count] for name, values in fields.items()}
+            columns = self.build_columns(fields, np.arange(first_item + 1, first_item + valid_count + 1))
+
+            yield from self.get_items(columns)
+
+            if valid_count < item_count:
+                return  # Termination condition
+
+    def get_items(self, columns):
+        # Turn every row of the decoded columns into the dictionary parse_item returns.
+        # Each column is converted to Python values once instead of once per row.
+        names, column_values = [], []
+        for name in list(columns) + list(getattr(columns, "lazy_columns", {})):
+            values = columns[name]
+            if isinstance(values, dict):
+                continue  # Nested tables are added by complete_item
+            names.append(name)
+            column_values.append(values.tolist())
+
+        for row_values in zip(*column_values):
+            yield self.complete_item(dict(zip(names, row_values)), columns)
+
+    def get_item(self, columns, row):
+        # Single-row version of get_items
+        item = {}
+        for name in list(columns) + list(getattr(columns, "lazy_columns", {})):
+            values = columns[name]
+            if isinstance(values, dict):
+                continue  # Nested tables are added by complete_item
+            value = values[row]
+            if isinstance(value, np.ndarray):
+                item[name] = value.tolist()
+            elif isinstance(value, np.generic):
+                item[name] = value.item()
+            else:
+                item[name] = value
+        return self.complete_item(item, columns)
+
+    def complete_item(self, item, columns):
+        # Hook for item values that are not plain columns
+        return item
+
+    def decode_fields(self):
+        # Extract every field of the layout for all items in one pass
+        return compile_layout(self.LAYOUT)(self.answers, self.total_items)
+
+    def count_items(self, fields):
+        terminators = self.is_terminator(fields)
+        if terminators is None:
+            return len(next(iter(fields.values())))
+
+        # Find the first terminating item in one scan
+        hits = np.flatnonzero(terminators)
+        return int(hits[0]) if len(hits) else len(terminators)
+
+    def is_terminator(self, fields):
+        # No termination condition: every item is decoded
+        return None
+
+    def build_columns(self, fields, item_indexes):
+        return DecodedColumns({self.INDEX_NAME: item_indexes, **fields})
+
+    def build_frame(self, fields, item_indexes):
+        # One DataFrame column per value; multi-value columns are numbered (Answers_1, Answers_2, ...)
+        return pd.DataFrame(flatten_columns(self.build_columns(fields, item_indexes)))
+
+
+def flatten_columns(columns):
+    flat = {}
+    names = list(columns) + list(getattr(columns, "lazy_columns", {}))
+    for name in names:
+        values = columns[name]
+        if isinstance(values, dict):
+            continue  # Nested tables are not item-aligned
+        if getattr(values, "ndim", 1) == 2:
+            for idx in range(values.shape[1]):
+                flat[f"{name}_{idx + 1}"] = values[:, idx]
         else:
-            return f"{nonNumericCodePart}_{numericCodePart}"
+            flat[name] = values
+    return flat
+
+
+# Below this many items a bulk decode stays in-process, even when workers are requested
+PARALLEL_MIN_ITEMS = 500_000
+
+# Workers never fork the calling process: the Streamlit server has live threads and held locks
+# (decode cache, connection pool) that a forked child would inherit mid-use. A fork server
+# starts clean and forks cheaply; spawn is the fallback where it is not available.
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def decode_shared_items(shm_name, layout, first_item, item_count):
+    # Worker side of decode_items_in_processes: decode one shard straight from shared memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return compile_layout(layout)(shm.buf, item_count, first_item)
+    finally:
+        shm.close()
+
+
+def decode_items_in_processes(layout, blobs, item_counts, workers):
+    # Copy the whole items of every blob into one shared memory block. Workers attach to it
+    # by name, so the raw bytes are never pickled; only the decoded columns come back.
+    total_items = int(item_counts.sum())
+    shm = shared_memory.SharedMemory(create=True, size=max(total_items * layout.item_size, 1))
+    try:
+        position = 0
+        for blob, count in zip(blobs, item_counts):
+            size = int(count) * layout.item_size
+            shm.buf[position:position + size] = memoryview(blob).cast('B')[:size]
+            position += size
+
+        # One contiguous shard of items per worker
+        bounds = np.linspace(0, total_items, workers + 1).astype(np.int64)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context(WORKER_START_METHOD)) as executor:
+            chunks = list(executor.map(decode_shared_items, repeat(shm.name), repeat(layout),
+                                       bounds[:-1].tolist(), np.diff(bounds).tolist()))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Merge the columnar chunks in shard order
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def parse_all_candidates(make_helper, blobs, candidate_ids, workers=1, parallel_min_items=PARALLEL_MIN_ITEMS):
+    """Decode the answer blobs of many candidates in one pass.
+
+    `make_helper` builds a helper from an answers buffer, e.g. BinaryFcaHelper or
+    lambda answers: BinaryRatHelper(test_id, answers, is_nrat=True). Returns one long-format
+    DataFrame indexed by (CandidateId, item index), stopping each candidate at its own terminator.
+
+    With workers > 1 and at least `parallel_min_items` items, the items are decoded in a
+    process pool that reads the blobs from shared memory; smaller decodes stay in-process.
+    """
+    start = time.perf_counter()
+    blobs = [blob if blob is not None else b"" for blob in blobs]
+    candidate_ids = np.asarray(candidate_ids)
+    if len(blobs) != len(candidate_ids):
+        raise ValueError("Expected one candidate ID per answers blob.")
+
+    # The helper is only used for the format description and post-processing
+    helper = make_helper(b"")
+    item_size = helper.NUMBER_OF_BYTES
+    item_counts = np.array([len(blob) // item_size for blob in blobs], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(item_counts)])
+
+    if workers > 1 and offsets[-1] >= parallel_min_items:
+        fields = decode_items_in_processes(helper.LAYOUT, blobs, item_counts, workers)
+    else:
+        # Concatenate the whole items of every blob into one contiguous buffer
+        buffer = b"".join(memoryview(blob)[:count * item_size] for blob, count in zip(blobs, item_counts))
+        fields = compile_layout(helper.LAYOUT)(buffer, int(offsets[-1]))
+
+    # Per-item candidate and 1-based item index within its own blob
+    segments = np.repeat(np.arange(len(blobs)), item_counts)
+    item_indexes = np.arange(offsets[-1]) - offsets[segments] + 1
+
+    # Drop every item at or after the first terminator of its candidate
+    terminators = helper.is_terminator(fields)
+    if terminators is not None:
+        seen = np.concatenate([[0], np.cumsum(terminators)])
+        keep = (seen[1:] - seen[offsets[segments]]) == 0
+        fields = {name: values[keep] for name, values in fields.items()}
+        segments = segments[keep]
+        item_indexes = item_indexes[keep]
+
+    frame = helper.build_frame(fields, item_indexes)
+    frame.insert(0, "CandidateId", candidate_ids[segments])
+    frame = frame.set_index(["CandidateId", helper.INDEX_NAME])
+
+    metrics.record(f"decode.{helper.LAYOUT.name}.bulk_seconds", time.perf_counter() - start)
+    metrics.record(f"decode.{helper.LAYOUT.name}.items", len(frame))
+    return frame
+
+
+class BinaryPaq2018Helper(BinaryLayoutHelper):
+    CHAR_SIMPLIFY_OFFSET = 64  # For character conversion (A=65 in ASCII)
 
+    LAYOUT = BitLayout("PAQ2018", item_size=12, word_size=4, byteorder='little', bit_order='lsb', fields=(
+        BitField("LeftStatement", word=0, offset=0, width=27),   # statement code (bits 0-26)
+        BitField("RightStatement", word=1, offset=0, width=27),  # statement code (bits 0-26)
+        BitField("IsInversed", word=2, offset=0, width=1, dtype=bool),  # inversedBitSector (1 bit)
+        BitField("Answer", word=2, offset=1, width=3)            # answerBitSector (3 bits)
+    ))
 
-class BinaryFcaHelper:
-    BITVECTOR_BYTE_SIZE = 4
-    NUMBER_OF_BYTES = 16  # Number of bytes reserved for one item (128 bits)
+    # A statement code packs three letters, a two-digit number and an optional fourth letter
+    STATEMENT_LAYOUT = BitLayout("PAQ2018_STATEMENT", item_size=4, word_size=4, byteorder='little', bit_order='lsb', fields=(
+        BitField("Letters", word=0, offset=0, width=5, count=3),  # bits 0-14 (5 bits each)
+        BitField("Number", word=0, offset=15, width=7),           # bits 15-21 (7 bits)
+        BitField("Suffix", word=0, offset=22, width=5)            # bits 22-26 (5 bits)
+    ))
 
-    def __init__(self, fca_answers):
-        self.fca_answers = fca_answers
-        self.total_items = int(len(self.fca_answers) / self.NUMBER_OF_BYTES)
-
-    def parse_item(self, question_index):
-        if question_index < 1 or question_index > self.total_items:
-            raise ValueError(f"Question index {question_index} out of range.")
+    def __init__(self, paq2018_answers):
+        super().__init__(paq2018_answers)
+        self.paq2018_answers = self.answers
+
+    def build_columns(self, fields, item_indexes):
+        # Left and right statements share one lookup table
+        statements = self.get_statements_from_ints(np.stack([fields["LeftStatement"], fields["RightStatement"]], axis=1))
+
+        return DecodedColumns({
+            "ItemIndex": item_indexes,
+            "LeftStatement": statements[:, 0],
+            "RightStatement": statements[:, 1],
+            "IsInversed": fields["IsInversed"],
+            "Answer": fields["Answer"]
+        })
+
+    def get_statements_from_ints(self, codes):
+        # Build each distinct statement string once and map it back onto the items
+        unique_codes, inverse = np.unique(codes.ravel(), return_inverse=True)
+        parts = compile_layout(self.STATEMENT_LAYOUT)(unique_codes.astype('<u4').tobytes(), len(unique_codes))
+        lookup = np.array([
+            self.get_statement(letters, number, suffix)
+            for letters, number, suffix in zip(parts["Letters"].tolist(), parts["Number"].tolist(), parts["Suffix"].tolist())
+        ], dtype=object)
+        return lookup[inverse].reshape(codes.shape)
 
-        # Get the bytes for the question index
-        offset = (question_index - 1) * self.NUMBER_OF_BYTES
-        item_bytes = self.fca_answers[offset:offset + self.NUMBER_OF_BYTES]
+    def get_statement_from_int(self, value_int):
+        return self.get_statements_from_ints(np.array([value_int], dtype=np.uint32))[0]
 
-        if len(item_bytes) < self.NUMBER_OF_BYTES:
-            raise ValueError(f"Not enough data for question index {question_index}.")
+    def get_statement(self, letters, number, suffix):
+        # Convert to characters
+        statement = ''.join(chr(letter + self.CHAR_SIMPLIFY_OFFSET) for letter in letters) + f"_{number:02d}"
+        if suffix != 0:
+            # There's a second non-numeric part
+            statement += f"_{chr(suffix + self.CHAR_SIMPLIFY_OFFSET)}"
+        return statement
+
+
+class BinaryFcaHelper(BinaryLayoutHelper):
+    # Bit offsets count from the most significant bit of the first word, like the binary string
+    LAYOUT = BitLayout("FCA", item_size=16, word_size=8, byteorder='big', bit_order='msb', fields=(
+        BitField("ItemId", word=0, offset=0, width=20),
+        BitField("SequenceIds", word=0, offset=20, width=3, count=3),
+        BitField("Answers", word=0, offset=29, width=3, count=3),
+        BitField("CompetencyIds", word=0, offset=38, width=10, count=4, stride=19),
+        BitField("CorrectAnswers1", word=0, offset=48, width=3, count=3),
+        BitField("CorrectAnswers2", word=1, offset=3, width=3, count=3),
+        BitField("CorrectAnswers3", word=1, offset=22, width=3, count=3),
+        BitField("CorrectAnswers4", word=1, offset=41, width=3, count=3),
+        BitField("TimeSpent", word=1, offset=50, width=14)
+    ))
+    INDEX_NAME = "QuestionIndex"
 
-        # Get binary string
-        bits = self.get_binary_string_from_bytes(item_bytes)
+    def __init__(self, fca_answers):
+        super().__init__(fca_answers)
+        self.fca_answers = self.answers
 
-        # Extract values
-        item_id = self.get_value_from_binary_string(bits, 0, 20)
-        if item_id == 0:
-            return None  # Termination condition
+    def is_terminator(self, fields):
+        return fields["ItemId"] == 0
 
-        sequence_ids = [
-            self.get_value_from_binary_string(bits, 20, 3),
-            self.get_value_from_binary_string(bits, 23, 3),
-            self.get_value_from_binary_string(bits, 26, 3)
-        ]
+    def build_columns(self, fields, item_indexes):
+        sequence_ids = fields["SequenceIds"]
         # Adjust SequenceIds
-        sequence_ids = [
-            sid if sid != 0 else idx + 1
-            for idx, sid in enumerate(sequence_ids)
-        ]
+        sequence_ids = np.where(sequence_ids != 0, sequence_ids, np.arange(1, 4, dtype=sequence_ids.dtype))
 
-        answers = [
-            self.get_value_from_binary_string(bits, 29, 3),
-            self.get_value_from_binary_string(bits, 32, 3),
-            self.get_value_from_binary_string(bits, 35, 3)
-        ]
-
-        # Parse Competencies and their Correct Answers
-        competencies = []
-        competency_positions = [
-            (38, 48),   # Competency 1 start positions
-            (57, 67),   # Competency 2 start positions
-            (76, 86),   # Competency 3 start positions
-            (95, 105)   # Competency 4 start positions
-        ]
+        # Parse Competencies into a flat (item, slot) table, skipping empty slots
+        competency_ids = fields["CompetencyIds"]
+        correct_answers = np.stack([fields[f"CorrectAnswers{slot}"] for slot in range(1, 5)], axis=1)
+        item_rows, slots = np.nonzero(competency_ids)
 
-        for idx, (comp_start, corr_start) in enumerate(competency_positions):
-            competency_id = self.get_value_from_binary_string(bits, comp_start, 10)
-            if competency_id != 0:
-                correct_answers = [
-                    self.get_value_from_binary_string(bits, corr_start, 3),
-                    self.get_value_from_binary_string(bits, corr_start + 3, 3),
-                    self.get_value_from_binary_string(bits, corr_start + 6, 3)
-                ]
-                competencies.append({
-                    'CompetencyId': competency_id,
-                    'CorrectAnswers': correct_answers
-                })
-
-        time_spent = self.get_value_from_binary_string(bits, 114, 14)
-
-        return {
-            "QuestionIndex": question_index,
-            "ItemId": item_id,
+        return DecodedColumns({
+            "QuestionIndex": item_indexes,
+            "ItemId": fields["ItemId"],
             "SequenceIds": sequence_ids,
-            "Answers": answers,
-            "Competencies": competencies,
-            "TimeSpent": time_spent
-        }
-
-    def get_binary_string_from_bytes(self, bytes_list):
-        # Convert bytes to binary string
-        return ''.join(f'{byte:08b}' for byte in bytes_list)
-
-    def get_value_from_binary_string(self, bits, start_index, length):
-        # Extract integer value from binary string
-        return int(bits[start_index:start_index + length], 2)
-
-
-class BinaryBaqHelper:
-    BITVECTOR_BYTE_SIZE = 4
-    NUMBER_OF_BYTES = 8  # Number of bytes per item
-
-    # Define the bit masks and shifts
-    ITEM_ID_MASK = 0x3F  # 6 bits for ItemId (bits 0-5)
-    VALUE_MASK = 0xF     # 4 bits for each value (bits 6-9, 10-13, etc.)
-    VALUE_SHIFTS = [6, 10, 14, 18, 22]  # Bit positions for the five values
+            "Answers": fields["Answers"],
+            "Competencies": {
+                "QuestionIndex": item_indexes[item_rows],
+                "Slot": slots + 1,
+                "CompetencyId": competency_ids[item_rows, slots],
+                "CorrectAnswers": correct_answers[item_rows, slots]
+            },
+            "TimeSpent": fields["TimeSpent"]
+        })
+
+    def complete_item(self, item, columns):
+        # Collect this item's rows of the competency table
+        table = columns["Competencies"]
+        first = np.searchsorted(table["QuestionIndex"], item["QuestionIndex"], side='left')
+        last = np.searchsorted(table["QuestionIndex"], item["QuestionIndex"], side='right')
+        item["Competencies"] = [
+            {
+                'CompetencyId': int(table["CompetencyId"][idx]),
+                'CorrectAnswers': table["CorrectAnswers"][idx].tolist()
+            }
+            for idx in range(first, last)
+        ]
+        return item
+
+    def build_frame(self, fields, item_indexes):
+        # Spread the competency slots over the item row instead of a separate table
+        columns = self.build_columns(fields, item_indexes)
+        del columns["Competencies"]
+        for slot in range(1, 5):
+            columns[f"CompetencyId_{slot}"] = fields["CompetencyIds"][:, slot - 1]
+            columns[f"CorrectAnswers_{slot}"] = fields[f"CorrectAnswers{slot}"]
+        return pd.DataFrame(flatten_columns(columns))
+
+
+class BinaryBaqHelper(BinaryLayoutHelper):
+    LAYOUT = BitLayout("BAQ", item_size=8, word_size=4, byteorder='little', bit_order='lsb', fields=(
+        BitField("ItemId", word=0, offset=0, width=6),
+        BitField("IpsativeItemId", word=1, offset=0, width=6),
+        BitField("NormativeValues", word=0, offset=6, width=4, count=5),
+        BitField("IpsativeValues", word=1, offset=6, width=4, count=5)
+    ))
 
     def __init__(self, baq_answers):
-        self.baq_answers = baq_answers
-        self.total_items = int(len(self.baq_answers) / self.NUMBER_OF_BYTES)
-
-    def parse_item(self, item_index):
-        if item_index < 1 or item_index > self.total_items:
-            raise ValueError(f"Item index {item_index} out of range.")
-
-        offset = (item_index - 1) * self.NUMBER_OF_BYTES
-
-        if offset + self.NUMBER_OF_BYTES > len(self.baq_answers):
-            raise ValueError(f"Not enough data for item index {item_index}.")
-
-        item_bytes = self.baq_answers[offset:offset + self.NUMBER_OF_BYTES]
-
-        normative_bytes = item_bytes[:self.BITVECTOR_BYTE_SIZE]
-        ipsative_bytes = item_bytes[self.BITVECTOR_BYTE_SIZE:]
-
-        normative = int.from_bytes(normative_bytes, byteorder='little')
-        ipsative = int.from_bytes(ipsative_bytes, byteorder='little')
-
-        # Extract ItemId from both normative and ipsative data
-        item_id = self.extract_item_id(normative)
-        ipsative_item_id = self.extract_item_id(ipsative)
+        super().__init__(baq_answers)
+        self.baq_answers = self.answers
 
+    def build_columns(self, fields, item_indexes):
         # Check if ItemIds match
-        if item_id != ipsative_item_id:
+        for item_index in item_indexes[fields["ItemId"] != fields["IpsativeItemId"]]:
             print(f"Warning: ItemId mismatch at item index {item_index}")
 
-        # Extract NormativeValues and IpsativeValues
-        normative_values = self.extract_values(normative)
-        ipsative_values = self.extract_values(ipsative)
-
-        return {
-            "ItemIndex": item_index,
-            "ItemId": item_id,
-            "NormativeValues": normative_values,
-            "IpsativeValues": ipsative_values
-        }
-
-    def extract_item_id(self, value):
-        return value & self.ITEM_ID_MASK
+        return DecodedColumns({
+            "ItemIndex": item_indexes,
+            "ItemId": fields["ItemId"],
+            "NormativeValues": fields["NormativeValues"],
+            "IpsativeValues": fields["IpsativeValues"]
+        })
 
-    def extract_values(self, value):
-        values = []
-        for shift in self.VALUE_SHIFTS:
-            val = (value >> shift) & self.VALUE_MASK
-            values.append(val)
-        return values
 
-
-class BinarySjtHelper:
-    NUMBER_OF_BYTES = 8  # Number of bytes per item
+class BinarySjtHelper(BinaryLayoutHelper):
+    # Bit offsets count from the most significant bit, like the binary string
+    LAYOUT = BitLayout("SJT", item_size=8, word_size=8, byteorder='big', bit_order='msb', fields=(
+        BitField("SituationId", word=0, offset=0, width=20),
+        BitField("SequenceIds", word=0, offset=20, width=4, count=3),
+        BitField("Answers", word=0, offset=32, width=3, count=3),
+        BitField("Scores", word=0, offset=41, width=3, count=3),
+        BitField("TimeSpent", word=0, offset=50, width=14)
+    ))
 
     def __init__(self, sjt_answers):
-        self.sjt_answers = sjt_answers
-        self.total_items = int(len(self.sjt_answers) / self.NUMBER_OF_BYTES)
-
-    def parse_item(self, item_index):
-        if item_index < 1 or item_index > self.total_items:
-            raise ValueError(f"Item index {item_index} out of range.")
+        super().__init__(sjt_answers)
+        self.sjt_answers = self.answers
 
-        # Get the bytes for the question index
-        offset = (item_index - 1) * self.NUMBER_OF_BYTES
-        item_bytes = self.sjt_answers[offset:offset + self.NUMBER_OF_BYTES]
+    def decode_all(self):
+        columns = self.decode_columns()
 
-        if len(item_bytes) < self.NUMBER_OF_BYTES:
-            raise ValueError(f"Not enough data for item index {item_index}.")
+        # Stop at the first item with SituationId == 0 (termination condition)
+        item_count = self.count_items(columns)
 
-        # Get binary string
-        bits = self.get_binary_string(item_bytes)
+        return DecodedColumns({name: values[:item_count] for name, values in columns.items()})
 
-        # Extract values
-        situation_id = self.get_value_from_binary_string(bits, 0, 20)
-        if situation_id == 0:
-            return None  # Termination condition
+    def is_terminator(self, fields):
+        return fields["SituationId"] == 0
 
-        sequence_ids = [
-            self.get_value_from_binary_string(bits, 20, 4),
-            self.get_value_from_binary_string(bits, 24, 4),
-            self.get_value_from_binary_string(bits, 28, 4)
-        ]
+    def build_columns(self, fields, item_indexes):
+        sequence_ids = fields["SequenceIds"]
         # Adjust SequenceIds
-        sequence_ids = [
-            sid if sid != 0 else idx + 1
-            for idx, sid in enumerate(sequence_ids)
-        ]
+        sequence_ids = np.where(sequence_ids != 0, sequence_ids, np.arange(1, 4, dtype=sequence_ids.dtype))
 
-        answers = [
-            self.get_value_from_binary_string(bits, 32, 3),
-            self.get_value_from_binary_string(bits, 35, 3),
-            self.get_value_from_binary_string(bits, 38, 3)
-        ]
-
-        scores = [
-            self.get_value_from_binary_string(bits, 41, 3),
-            self.get_value_from_binary_string(bits, 44, 3),
-            self.get_value_from_binary_string(bits, 47, 3)
-        ]
-
-        time_spent = self.get_value_from_binary_string(bits, 50, 14)
-
-        return {
-            "ItemIndex": item_index,
-            "SituationId": situation_id,
+        return DecodedColumns({
+            "ItemIndex": item_indexes,
+            "SituationId": fields["SituationId"],
             "SequenceIds": sequence_ids,
-            "Answers": answers,
-            "Scores": scores,
-            "TimeSpent": time_spent
-        }
+            "Answers": fields["Answers"],
+            "Scores": fields["Scores"],
+            "TimeSpent": fields["TimeSpent"]
+        })
+
+class BinaryRatHelper(BinaryLayoutHelper):
+    RAT_LAYOUT = BitLayout("RAT", item_size=8, word_size=4, byteorder='little', bit_order='lsb', fields=(
+        BitField("ScreenId", word=0, offset=0, width=15),        # 15 bits (bits 0-14)
+        BitField("CloneId", word=0, offset=15, width=8),         # 8 bits (bits 15-22)
+        BitField("ItemId", word=0, offset=23, width=8),          # 8 bits (bits 23-30)
+        BitField("Answer", word=1, offset=0, width=4),           # 4 bits (bits 0-3)
+        BitField("CorrectAnswer", word=1, offset=4, width=4),    # 4 bits (bits 4-7)
+        BitField("TimeSpent", word=1, offset=8, width=12),       # 12 bits (bits 8-19)
+        BitField("IsAnswered", word=1, offset=20, width=1, dtype=bool)  # 1 bit (bit 20)
+    ))
+    NRAT_LAYOUT = BitLayout("NRAT", item_size=12, word_size=4, byteorder='little', bit_order='lsb', fields=(
+        BitField("ScreenId", word=0, offset=0, width=15),        # 15 bits (bits 0-14)
+        BitField("CloneId", word=0, offset=15, width=15),        # 15 bits (bits 15-29)
+        BitField("ItemId", word=1, offset=0, width=15),          # 15 bits (bits 0-14)
+        BitField("ItemCloneId", word=1, offset=15, width=15),    # 15 bits (bits 15-29)
+        BitField("Answer", word=2, offset=0, width=4),           # 4 bits (bits 0-3)
+        BitField("CorrectAnswer", word=2, offset=4, width=4),    # 4 bits (bits 4-7)
+        BitField("TimeSpent", word=2, offset=8, width=12),       # 12 bits (bits 8-19)
+        BitField("IsAnswered", word=2, offset=20, width=1, dtype=bool)  # 1 bit (bit 20)
+    ))
+    INDEX_NAME = "QuestionIndex"
 
-    def get_binary_string(self, bytes_list):
-        # Convert bytes to binary string
-        return ''.join(f'{byte:08b}' for byte in bytes_list)
-
-    def get_value_from_binary_string(self, bits, start_index, length):
-        # Extract integer value from binary string
-        return int(bits[start_index:start_index + length], 2)
-
-class BinaryRatHelper:
     def __init__(self, assessment_model_config_code, rat_answers, is_nrat=False):
         self.TestId = assessment_model_config_code
-        self.rat_answers = rat_answers
         self.is_nrat = is_nrat
 
-        if self.is_nrat:
-            self.NUMBER_OF_BYTES = 12  # 12 bytes per item for NRAT
-        else:
-            self.NUMBER_OF_BYTES = 8   # 8 bytes per item for RAT
-
-        self.total_items = int(len(self.rat_answers) / self.NUMBER_OF_BYTES)
-
-    def parse_item(self, question_index):
-        if question_index < 1 or question_index > self.total_items:
-            raise ValueError(f"Question index {question_index} out of range.")
+        # 12 bytes per item for NRAT, 8 bytes per item for RAT
+        self.LAYOUT = self.NRAT_LAYOUT if self.is_nrat else self.RAT_LAYOUT
 
-        offset = (question_index - 1) * self.NUMBER_OF_BYTES
-        item_bytes = self.rat_answers[offset:offset + self.NUMBER_OF_BYTES]
+        super().__init__(rat_answers)
+        self.rat_answers = self.answers
 
-        if len(item_bytes) < self.NUMBER_OF_BYTES:
-            raise ValueError(f"Not enough data for question index {question_index}.")
+    def is_terminator(self, fields):
+        return fields["ItemId"] == 0
 
-        if not self.is_nrat:
-            # RAT Parsing Logic
-            definition_bytes = item_bytes[:4]
-            value_bytes = item_bytes[4:]
+    def build_columns(self, fields, item_indexes):
+        # QuestionCode is only built when it is read. The builder only holds the test and format,
+        # never this helper, so cached columns do not keep the answers buffer alive.
+        return DecodedColumns({"QuestionIndex": item_indexes, **fields},
+                              {"QuestionCode": partial(get_question_codes, self.TestId, self.is_nrat)})
 
-            # Convert bytes to integers (little-endian)
-            definition = int.from_bytes(definition_bytes, byteorder='little')
-            value = int.from_bytes(value_bytes, byteorder='little')
+    def get_format_key(self):
+        # QuestionCode depends on the test, so blobs of different tests never share an entry
+        return self.LAYOUT.name, self.TestId
 
-            # Extract fields from definition bit vector
-            screen_id = (definition >> 0) & 0x7FFF  # 15 bits (bits 0-14)
-            clone_id = (definition >> 15) & 0xFF    # 8 bits (bits 15-22)
-            item_id = (definition >> 23) & 0xFF     # 8 bits (bits 23-30)
+    def complete_item(self, item, columns):
+        item["IsEmpty"] = False  # Empty items end the iteration
+        return item
 
-            # Extract fields from value bit vector
-            answer = (value >> 0) & 0xF             # 4 bits (bits 0-3)
-            correct_answer = (value >> 4) & 0xF     # 4 bits (bits 4-7)
-            time_spent = (value >> 8) & 0xFFF       # 12 bits (bits 8-19)
-            is_answered = (value >> 20) & 0x1       # 1 bit (bit 20)
+    def get_question_codes(self, columns):
+        return get_question_codes(self.TestId, self.is_nrat, columns)
 
-            is_empty = item_id == 0
+    def get_question_code(self, screen_id, clone_id, item_id, item_clone_id=None):
+        return get_question_code(self.TestId, screen_id, clone_id, item_id, item_clone_id)
 
-            if is_empty:
-                return None  # Termination condition
 
-            question_code = f"{self.TestId}_S{str(screen_id).zfill(4)}_C{str(clone_id).zfill(2)}_Q{str(item_id).zfill(2)}"
+def get_question_codes(test_id, is_nrat, columns):
+    # Format each distinct question once and return a categorical column
+    key_names = ["ScreenId", "CloneId", "ItemId", "ItemCloneId"] if is_nrat else ["ScreenId", "CloneId", "ItemId"]
 
-            return {
-                "QuestionIndex": question_index,
-                "QuestionCode": question_code,
-                "ScreenId": screen_id,
-                "CloneId": clone_id,
-                "ItemId": item_id,
-                "Answer": answer,
-                "CorrectAnswer": correct_answer,
-                "TimeSpent": time_spent,
-                "IsAnswered": bool(is_answered),
-                "IsEmpty": is_empty
-            }
-
-        else:
-            # NRAT Parsing Logic
-            screen_definition_bytes = item_bytes[:4]
-            item_definition_bytes = item_bytes[4:8]
-            value_bytes = item_bytes[8:]
-
-            # Convert bytes to integers (little-endian)
-            screen_definition = int.from_bytes(screen_definition_bytes, byteorder='little')
-            item_definition = int.from_bytes(item_definition_bytes, byteorder='little')
-            value = int.from_bytes(value_bytes, byteorder='little')
+    # Pack the (at most 15-bit) ids into one 64-bit key, 16 bits per id, so one 1-D unique finds the questions
+    keys = np.zeros(len(columns["ItemId"]), dtype=np.uint64)
+    for name in key_names:
+        keys = (keys << np.uint64(16)) | columns[name].astype(np.uint64)
+    unique_keys, codes = np.unique(keys, return_inverse=True)
 
-            # Extract fields from screen definition bit vector
-            screen_id = (screen_definition >> 0) & 0x7FFF     # 15 bits (bits 0-14)
-            clone_id = (screen_definition >> 15) & 0x7FFF     # 15 bits (bits 15-29)
+    categories = []
+    for key in unique_keys.tolist():
+        ids = [(key >> (16 * idx)) & 0xFFFF for idx in reversed(range(len(key_names)))]
+        categories.append(get_question_code(test_id, *ids))
+    return pd.Categorical.from_codes(codes.ravel(), categories=categories)
 
-            # Extract fields from item definition bit vector
-            item_id = (item_definition >> 0) & 0x7FFF         # 15 bits (bits 0-14)
-            item_clone_id = (item_definition >> 15) & 0x7FFF  # 15 bits (bits 15-29)
 
-            # Extract fields from value bit vector
-            answer = (value >> 0) & 0xF             # 4 bits (bits 0-3)
-            correct_answer = (value >> 4) & 0xF     # 4 bits (bits 4-7)
-            time_spent = (value >> 8) & 0xFFF       # 12 bits (bits 8-19)
-            is_answered = (value >> 20) & 0x1       # 1 bit (bit 20)
+def get_question_code(test_id, screen_id, clone_id, item_id, item_clone_id=None):
+    question_code = f"{test_id}_S{str(screen_id).zfill(4)}_C{str(clone_id).zfill(2)}_Q{str(item_id).zfill(2)}"
+    if item_clone_id is not None:
+        question_code += f"_C{str(item_clone_id).zfill(2)}"
+    return question_code
 
-            is_empty = item_id == 0
-
-            if is_empty:
-                return None  # Termination condition
-
-            question_code = f"{self.TestId}_S{str(screen_id).zfill(4)}_C{str(clone_id).zfill(2)}_Q{str(item_id).zfill(2)}_C{str(item_clone_id).zfill(2)}"
-
-            return {
-                "QuestionIndex": question_index,
-                "QuestionCode": question_code,
-                "ScreenId": screen_id,
-                "CloneId": clone_id,
-                "ItemId": item_id,
-                "ItemCloneId": item_clone_id,
-                "Answer": answer,
-                "CorrectAnswer": correct_answer,
-                "TimeSpent": time_spent,
-                "IsAnswered": bool(is_answered),
-                "IsEmpty": is_empty
-            }
 
-class BinaryMdqRegulationHelper:
-    BITVECTOR_BYTE_SIZE = 4
-    NUMBER_OF_BYTES = 8  # Number of bytes reserved for one item
+class BinaryMdqRegulationHelper(BinaryLayoutHelper):
+    LAYOUT = BitLayout("MDQ_REGULATION", item_size=8, word_size=4, byteorder='little', bit_order='lsb', fields=(
+        BitField("ItemId", word=0, offset=0, width=6),
+        BitField("NormativeValues", word=0, offset=6, width=3, count=6),
+        BitField("IpsativeValues", word=1, offset=6, width=3, count=6)
+    ))
 
     def __init__(self, mdq_answers):
-        self.mdq_answers = mdq_answers
-        self.total_items = int(len(self.mdq_answers) / self.NUMBER_OF_BYTES)
-
-    def parse_item(self, item_index):
-        if item_index < 1 or item_index > self.total_items:
-            raise ValueError(f"Item index {item_index} out of range.")
-
-        # Get the bytes for the item index
-        offset = (item_index - 1) * self.NUMBER_OF_BYTES
-        item_bytes = self.mdq_answers[offset:offset + self.NUMBER_OF_BYTES]
-
-        if len(item_bytes) < self.NUMBER_OF_BYTES:
-            raise ValueError(f"Not enough data for item index {item_index}.")
-
-        # Convert bytes to integers
-        normative = int.from_bytes(item_bytes[:self.BITVECTOR_BYTE_SIZE], byteorder='little')
-        ipsative = int.from_bytes(item_bytes[self.BITVECTOR_BYTE_SIZE:], byteorder='little')
-
-        item_id = self.extract_item_id(normative)
-        normative_values = self.extract_values(normative)
-        ipsative_values = self.extract_values(ipsative)
-
-        # Check for termination condition (all zeros)
-        if item_id == 0 and all(value == 0 for value in normative_values) and all(value == 0 for value in ipsative_values):
-            return None  # Termination condition
-
-        return {
-            "ItemIndex": item_index,
-            "ItemId": item_id,
-            "NormativeValues": normative_values,
-            "IpsativeValues": ipsative_values
-        }
-
-    def extract_item_id(self, value):
-        return (value >> 0) & 0x3F  # 6 bits for ItemId
-
-    def extract_values(self, value):
-        value_masks = [0x7, 0x7, 0x7, 0x7, 0x7, 0x7]
-        value_shifts = [6, 9, 12, 15, 18, 21]
-        values = [(value >> shift) & mask for shift, mask in zip(value_shifts, value_masks)]
-        return values
\ No newline at end of file
+        super().__init__(mdq_answers)
+        self.mdq_answers = self.answers
+
+    def is_terminator(self, fields):
+        # Termination condition (all zeros)
+        return ((fields["ItemId"] == 0)
+                & ~fields["NormativeValues"].any(axis=1)
+                & ~fields["IpsativeValues"].any(axis=1))
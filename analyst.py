@@ -1,15 +1,10 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from io import BytesIO
-from layout import add_navbar
+from layout import add_navbar, track_rerun
+from charts import render_chart, get_data_fingerprint
+from summary_stats import STATISTICS_ROWS, format_statistic, get_summary
 
-# Function to convert graphs to PNG and download
-def download_plot(fig, filename="plot.png"):
-    buf = BytesIO()
-    fig.savefig(buf, format="png")
-    buf.seek(0)
-    return buf
+GRAPH_OPTIONS = ["Line Chart", "Bar Chart", "Horizontal Bar Chart", "Scatter Plot"]
 
 # Cached function for generating static data
 @st.cache_data
@@ -20,11 +15,94 @@ def get_data():
     scatter_y = np.random.rand(100)
     return x, bar_x, scatter_x, scatter_y
 
-# Function to handle page state changes and reruns
-def handle_page_state(new_option):
-    if st.session_state.graph_option != new_option:
-        st.session_state.graph_option = new_option
-        st.rerun()
+# Function to remember the chosen graph, also when the dashboard is left and opened again
+def select_graph():
+    st.session_state.graph_option = st.session_state.graph_dropdown
+
+# Chart area as a fragment: a widget inside it reruns only this function, not the whole script
+@st.fragment
+def show_chart_area():
+    with track_rerun("chart_fragment"):
+        # Get the cached data
+        x, bar_x, scatter_x, scatter_y = get_data()
+
+        if 'graph_option' not in st.session_state:
+            st.session_state.graph_option = "Line Chart"
+
+        # Use a container
+        with st.container():
+            # Split the page into three columns
+            col1, col2, col3 = st.columns([1, 2, 1])  # Middle column is twice as wide
+
+            # Graph options in the left column, inside the fragment, so switching graphs only
+            # reruns the chart area
+            with col1:
+                st.markdown("## Choose a graph")
+                graph_options = st.selectbox(
+                    "Select a graph:",
+                    options=GRAPH_OPTIONS,
+                    index=GRAPH_OPTIONS.index(st.session_state.graph_option),
+                    key='graph_dropdown',
+                    on_change=select_graph
+                )
+
+            with col2:  # Place the graphs in the middle column
+                # Line Chart
+                if graph_options == "Line Chart":
+                    st.markdown("<h2 >Line Chart</h2>", unsafe_allow_html=True)
+                    png_line_chart = render_chart("Line Chart", x)
+                    st.image(png_line_chart)
+
+                    # Add a download button for the line chart, serving the same rendered image
+                    st.write("##")
+                    st.download_button("Download Line Chart", png_line_chart, "line_chart.png", "image/png",
+                                       on_click="ignore")
+
+                # Bar Chart
+                elif graph_options == "Bar Chart":
+                    st.markdown("<h2 >Bar Chart</h2>", unsafe_allow_html=True)
+                    png_bar_chart = render_chart("Bar Chart", bar_x)
+                    st.image(png_bar_chart)
+
+                    # Add a download button for the bar chart, serving the same rendered image
+                    st.write("##")
+                    st.download_button("Download Bar Chart", png_bar_chart, "bar_chart.png", "image/png",
+                                       on_click="ignore")
+
+                # Horizontal Bar Chart
+                elif graph_options == "Horizontal Bar Chart":
+                    st.markdown("<h2 >Horizontal Bar Chart</h2>", unsafe_allow_html=True)
+                    png_horizontal_bar_chart = render_chart("Horizontal Bar Chart", bar_x)
+                    st.image(png_horizontal_bar_chart)
+
+                    # Add a download button for the horizontal bar chart, serving the same rendered image
+                    st.write("##")
+                    st.download_button("Download Horizontal Bar Chart", png_horizontal_bar_chart, "horizontal_bar_chart.png", "image/png",
+                                       on_click="ignore")
+
+                # Scatter Plot
+                elif graph_options == "Scatter Plot":
+                    st.markdown("<h2>Scatter Plot</h2>", unsafe_allow_html=True)
+                    png_scatter_plot = render_chart("Scatter Plot", scatter_x, scatter_y)
+                    st.image(png_scatter_plot)
+
+                    # Add a download button for the scatter plot, serving the same rendered image
+                    st.write("##")
+                    st.download_button("Download Scatter Plot", png_scatter_plot, "scatter_plot.png", "image/png",
+                                       on_click="ignore")
+
+                    # Statistics in the right column
+                    with col3:
+                        st.write("##")
+                        st.write("##")
+                        st.write("##")
+                        st.write("Statistics")
+                        # One pass per axis, cached per dataset
+                        stats_x = get_summary(get_data_fingerprint(scatter_x), scatter_x)
+                        stats_y = get_summary(get_data_fingerprint(scatter_y), scatter_y)
+                        for label, name in STATISTICS_ROWS:
+                            st.write(f"**{label}**: | X: {format_statistic(stats_x[name])} | "
+                                     f"Y: {format_statistic(stats_y[name])}")
 
 # Analyst dashboard function with graphs
 def show_analyst_dashboard():
@@ -34,106 +112,8 @@ def show_analyst_dashboard():
     # Page title
     st.markdown("<h1>Analyst Dashboard</h1>", unsafe_allow_html=True)
 
-    # Get the cached data
-    x, bar_x, scatter_x, scatter_y = get_data()
-
-    # Sidebar graph options
-    if 'graph_option' not in st.session_state:
-        st.session_state.graph_option = "Line Chart"
-
-    st.sidebar.markdown("## Choose a graph")
-    graph_options = st.sidebar.selectbox(
-        "Select a graph:",
-        options=("Line Chart", "Bar Chart", "Horizontal Bar Chart", "Scatter Plot"),
-        index=["Line Chart", "Bar Chart", "Horizontal Bar Chart", "Scatter Plot"].index(st.session_state.graph_option),
-        key='graph_dropdown'
-    )
-    
-    # Handle graph option change with state management
-    handle_page_state(graph_options)
-
-    # Use a container
-    with st.container():
-        # Split the page into three columns
-        col1, col2, col3 = st.columns([1, 2, 1])  # Middle column is twice as wide
-
-        with col2:  # Place the graphs in the middle column
-            # Line Chart
-            if graph_options == "Line Chart":
-                st.markdown("<h2 >Line Chart</h2>", unsafe_allow_html=True)
-                fig_line_chart = plt.figure(figsize=(5, 3))
-                plt.plot(x, np.sin(x), color='blue', label='sin(x)')
-                plt.plot(x, np.cos(x), color='green', label='cos(x)')
-                plt.legend()
-                st.pyplot(fig_line_chart)
-
-                # Add a download button for the line chart
-                buf_line_chart = download_plot(fig_line_chart)
-                st.write("##")
-                st.download_button("Download Line Chart", buf_line_chart, "line_chart.png", "image/png")
-
-            # Bar Chart
-            elif graph_options == "Bar Chart":
-                st.markdown("<h2 >Bar Chart</h2>", unsafe_allow_html=True)
-                fig_bar_chart = plt.figure(figsize=(5, 3))
-                plt.bar(bar_x, bar_x * 10)
-                plt.xlabel('Categories')
-                plt.ylabel('Values')
-                st.pyplot(fig_bar_chart)
-
-                # Add a download button for the bar chart
-                buf_bar_chart = download_plot(fig_bar_chart)
-                st.write("##")
-                st.download_button("Download Bar Chart", buf_bar_chart, "bar_chart.png", "image/png")
-
-            # Horizontal Bar Chart
-            elif graph_options == "Horizontal Bar Chart":
-                st.markdown("<h2 >Horizontal Bar Chart</h2>", unsafe_allow_html=True)
-                fig_horizontal_bar_chart = plt.figure(figsize=(5, 3))
-                plt.barh(bar_x, bar_x * 10)
-                plt.xlabel('Values')
-                plt.ylabel('Categories')
-                st.pyplot(fig_horizontal_bar_chart)
-
-                # Add a download button for the horizontal bar chart
-                buf_horizontal_bar_chart = download_plot(fig_horizontal_bar_chart)
-                st.write("##")
-                st.download_button("Download Horizontal Bar Chart", buf_horizontal_bar_chart, "horizontal_bar_chart.png", "image/png")
-
-            # Scatter Plot
-            elif graph_options == "Scatter Plot":
-                st.markdown("<h2>Scatter Plot</h2>", unsafe_allow_html=True)
-                fig_scatter_plot = plt.figure(figsize=(5, 3))
-                plt.scatter(scatter_x, scatter_y, c='blue', alpha=0.5)
-                plt.xlabel('X-axis')
-                plt.ylabel('Y-axis')
-                st.pyplot(fig_scatter_plot)
-
-                # Add a download button for the scatter plot
-                buf_scatter_plot = download_plot(fig_scatter_plot)
-                st.write("##")
-                st.download_button("Download Scatter Plot", buf_scatter_plot, "scatter_plot.png", "image/png")
-
-                # Statistics in the right column
-                with col3:
-                    st.write("##")
-                    st.write("##")
-                    st.write("##")
-                    st.write("Statistics")
-                    st.write(f"**Mean**:     | X: {np.mean(scatter_x):.2f} | Y: {np.mean(scatter_y):.2f}")
-                    st.write(f"**Median**:   | X: {np.median(scatter_x):.2f} | Y: {np.median(scatter_y):.2f}")
-                    st.write(f"**Std Dev**:  | X: {np.std(scatter_x):.2f} | Y: {np.std(scatter_y):.2f}")
-                    st.write(f"**Minimum**:  | X: {np.min(scatter_x):.2f} | Y: {np.min(scatter_y):.2f}")
-                    st.write("**Maximum**:  | X: 5.00 | Y: 5.00")
-                    st.write(f"**Variance**:  | X: {np.var(scatter_x):.2f} | Y: {np.var(scatter_y):.2f}")
-                    
-                    # Calculate IQR
-                    q1_x, q3_x = np.percentile(scatter_x, [25, 75])
-                    iqr_x = q3_x - q1_x
-                    q1_y, q3_y = np.percentile(scatter_y, [25, 75])
-                    iqr_y = q3_y - q1_y
-
-                    st.write(f"**IQR**:      | X: {iqr_x:.2f} | Y: {iqr_y:.2f}")
+    # Chart area, rerun on its own when another graph is chosen
+    show_chart_area()
 
 if __name__ == "__main__":
     show_analyst_dashboard()
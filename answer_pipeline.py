@@ -0,0 +1,337 @@
+# answer_pipeline.py
+#
+# Streams answer blobs from the database, decodes them chunk by chunk and feeds running
+# aggregates, so the full result set is never held in memory. Fetching, decoding and
+# aggregating run in their own threads, connected by bounded queues: when a later stage falls
+# behind, the earlier one blocks instead of piling up chunks.
+#
+#   DB_BACKEND=sqlite SQLITE_PATH=hudson.sqlite python answer_pipeline.py --chunk-rows 500
+
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from BinaryParsers import (
+    BinaryBaqHelper,
+    BinaryFcaHelper,
+    BinaryMdqRegulationHelper,
+    BinaryPaq2018Helper,
+    BinaryRatHelper,
+    BinarySjtHelper,
+    parse_all_candidates,
+)
+from db_viewer import DatabaseConnection
+
+PIPELINE_CHUNK_ROWS = 1000  # Answer blobs fetched per chunk
+PIPELINE_QUEUE_CHUNKS = 2  # Chunks a stage may run ahead of the next one
+
+# Columns of the answers query
+CANDIDATE_COLUMN = "CandidateId"
+FORMAT_COLUMN = "Format"
+TEST_COLUMN = "TestId"
+BLOB_COLUMN = "AnswerBlob"
+
+# The default query reads the synthetic schema (synthetic_blobs.py). Set ANSWERS_TABLE when the
+# answers live in another table, or ANSWERS_QUERY for another schema; its columns must then be
+# aliased to the names above, e.g. SELECT c.Id AS CandidateId, ... (loaded from .env by db_viewer)
+ANSWERS_TABLE = os.getenv('ANSWERS_TABLE', 'Answers')
+ANSWERS_QUERY = os.getenv(
+    'ANSWERS_QUERY',
+    f"SELECT {CANDIDATE_COLUMN}, {FORMAT_COLUMN}, {TEST_COLUMN}, {BLOB_COLUMN} FROM {ANSWERS_TABLE}")
+
+# Format -> function of the test id returning a helper factory for parse_all_candidates
+HELPER_FACTORIES = {
+    "PAQ2018": lambda test_id: BinaryPaq2018Helper,
+    "FCA": lambda test_id: BinaryFcaHelper,
+    "BAQ": lambda test_id: BinaryBaqHelper,
+    "SJT": lambda test_id: BinarySjtHelper,
+    "RAT": lambda test_id: lambda answers: BinaryRatHelper(test_id, answers),
+    "NRAT": lambda test_id: lambda answers: BinaryRatHelper(test_id, answers, is_nrat=True),
+    "MDQ_REGULATION": lambda test_id: BinaryMdqRegulationHelper,
+}
+
+# Format -> (column identifying the item, columns holding the candidate's answers)
+ITEM_ANSWER_COLUMNS = {
+    "PAQ2018": ("ItemIndex", ["Answer"]),
+    "FCA": ("ItemId", ["Answers_1", "Answers_2", "Answers_3"]),
+    "BAQ": ("ItemId", [f"NormativeValues_{idx}" for idx in range(1, 6)]),
+    "SJT": ("SituationId", ["Answers_1", "Answers_2", "Answers_3"]),
+    "RAT": ("QuestionCode", ["Answer"]),
+    "NRAT": ("QuestionCode", ["Answer"]),
+    "MDQ_REGULATION": ("ItemId", [f"NormativeValues_{idx}" for idx in range(1, 7)]),
+}
+
+# Marks the end of a stage's output
+END_OF_STREAM = object()
+
+
+class StageError:
+    # Carries an exception from a stage thread to the consumer, which re-raises it
+    def __init__(self, error):
+        self.error = error
+
+
+class UpstreamFailed(Exception):
+    # Raised inside a stage when the stage before it failed
+    def __init__(self, stage_error):
+        super().__init__(str(stage_error.error))
+        self.stage_error = stage_error
+
+
+def get_column(frame, name):
+    # Decoded frames keep CandidateId and the item index in their index
+    if name in frame.index.names:
+        return frame.index.get_level_values(name)
+    return frame[name]
+
+
+class AnswerDistribution:
+    """Counts of every answer value per item and answer column, for each format."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def update(self, format_name, frame):
+        if format_name not in ITEM_ANSWER_COLUMNS:
+            return
+        item_column, answer_columns = ITEM_ANSWER_COLUMNS[format_name]
+        # Plain values, so categoricals with different categories per chunk still line up
+        items = np.asarray(get_column(frame, item_column))
+
+        # One grouping over all answer columns stacked, with the column as its position
+        counts = pd.DataFrame({
+            "Item": np.tile(items, len(answer_columns)),
+            "Column": np.repeat(np.arange(len(answer_columns)), len(items)),
+            "Answer": frame[answer_columns].to_numpy().ravel(order='F')
+        }).groupby(["Item", "Column", "Answer"], sort=False).size()
+        previous = self.counts.get(format_name)
+        self.counts[format_name] = counts if previous is None else previous.add(counts, fill_value=0)
+
+    def result(self):
+        # One row per (item, answer column), one column per answer value
+        results = {}
+        for format_name, counts in self.counts.items():
+            answer_columns = ITEM_ANSWER_COLUMNS[format_name][1]
+            distribution = counts.unstack("Answer", fill_value=0).astype(np.int64).sort_index().sort_index(axis=1)
+            distribution.index = distribution.index.set_levels(
+                [answer_columns[position] for position in distribution.index.levels[1]], level="Column")
+            results[format_name] = distribution
+        return results
+
+
+class MeanTimeSpent:
+    """Mean TimeSpent over all items of each format that records it."""
+
+    def __init__(self):
+        self.totals = {}  # Format -> [sum, count]
+
+    def update(self, format_name, frame):
+        if "TimeSpent" not in frame:
+            return
+        totals = self.totals.setdefault(format_name, [0, 0])
+        totals[0] += int(frame["TimeSpent"].to_numpy().sum(dtype=np.int64))
+        totals[1] += len(frame)
+
+    def result(self):
+        return {format_name: total / count for format_name, (total, count) in self.totals.items() if count}
+
+
+class CompetencyScores:
+    """FCA competency scores: the share of answers matching each competency's correct answers."""
+
+    def __init__(self):
+        self.scores = None
+
+    def update(self, format_name, frame):
+        if format_name != "FCA":
+            return
+        answers = frame[["Answers_1", "Answers_2", "Answers_3"]].to_numpy()
+
+        slot_scores = []
+        for slot in range(1, 5):
+            competency_ids = frame[f"CompetencyId_{slot}"].to_numpy()
+            correct_answers = frame[[f"CorrectAnswers_{slot}_{idx}" for idx in range(1, 4)]].to_numpy()
+            has_competency = competency_ids != 0
+            slot_scores.append(pd.DataFrame({
+                "CompetencyId": competency_ids[has_competency],
+                "Items": 1,
+                "Matches": (answers[has_competency] == correct_answers[has_competency]).sum(axis=1)
+            }))
+
+        scores = pd.concat(slot_scores).groupby("CompetencyId").sum()
+        self.scores = scores if self.scores is None else self.scores.add(scores, fill_value=0)
+
+    def result(self):
+        if self.scores is None:
+            return pd.DataFrame(columns=["Items", "Matches", "Score"])
+        scores = self.scores.astype(np.int64)
+        scores["Score"] = scores["Matches"] / (scores["Items"] * 3)
+        return scores
+
+
+def get_default_aggregators():
+    return {
+        "AnswerDistribution": AnswerDistribution(),
+        "MeanTimeSpent": MeanTimeSpent(),
+        "CompetencyScores": CompetencyScores()
+    }
+
+
+class AnswerPipeline:
+    """Fetch → decode → aggregate over a query of answer blobs, in bounded memory.
+
+    At most `queue_chunks` fetched and `queue_chunks` decoded chunks wait between the stages,
+    so memory is bounded by the chunk size instead of the result size. Rows need the
+    CandidateId, Format, TestId and AnswerBlob columns; `query` defaults to ANSWERS_QUERY.
+    """
+
+    def __init__(self, db_connection, aggregators=None, chunk_rows=PIPELINE_CHUNK_ROWS,
+                 queue_chunks=PIPELINE_QUEUE_CHUNKS, query=ANSWERS_QUERY):
+        self.db_connection = db_connection
+        self.query = query
+        self.aggregators = aggregators if aggregators is not None else get_default_aggregators()
+        self.chunk_rows = chunk_rows
+        self.queue_chunks = queue_chunks
+        self.stop = threading.Event()
+        self.stats = self.new_stats()
+
+    def run(self, query=None, params=None):
+        """Run the pipeline and return {aggregator name: result}."""
+        if query is None:
+            query = self.query
+        self.stop.clear()
+        self.stats = self.new_stats()
+        fetched = queue.Queue(maxsize=self.queue_chunks)
+        decoded = queue.Queue(maxsize=self.queue_chunks)
+
+        threads = [
+            threading.Thread(target=self.fetch_stage, args=(query, params, fetched), name="pipeline-fetch"),
+            threading.Thread(target=self.decode_stage, args=(fetched, decoded), name="pipeline-decode")
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            for format_name, frame in self.iter_stage(decoded):
+                aggregate_start = time.perf_counter()
+                for aggregator in self.aggregators.values():
+                    aggregator.update(format_name, frame)
+                self.stats["AggregateSeconds"] += time.perf_counter() - aggregate_start
+        except UpstreamFailed as e:
+            raise e.stage_error.error from None
+        finally:
+            # Unblocks the other stages if aggregation stopped early
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stats["Seconds"] = time.perf_counter() - start
+        return {name: aggregator.result() for name, aggregator in self.aggregators.items()}
+
+    def new_stats(self):
+        return {"Rows": 0, "Items": 0, "FetchSeconds": 0.0, "DecodeSeconds": 0.0, "AggregateSeconds": 0.0}
+
+    def put(self, output, item):
+        # Block while the next stage is behind, but give up once the pipeline is stopped
+        while not self.stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def iter_stage(self, stage_queue):
+        # Yield the items of a stage until its end marker
+        while True:
+            try:
+                item = stage_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop.is_set():
+                    return
+                continue
+            if item is END_OF_STREAM:
+                return
+            if isinstance(item, StageError):
+                raise UpstreamFailed(item)
+            yield item
+
+    def fetch_stage(self, query, params, output):
+        try:
+            chunks = self.db_connection.iter_query(query, params, chunk_size=self.chunk_rows)
+            while True:
+                fetch_start = time.perf_counter()
+                chunk = next(chunks, None)
+                self.stats["FetchSeconds"] += time.perf_counter() - fetch_start
+                if chunk is None:
+                    break
+                self.stats["Rows"] += len(chunk)
+                if not self.put(output, chunk):
+                    chunks.close()
+                    return
+            self.put(output, END_OF_STREAM)
+        except Exception as e:
+            logging.error(f"Error fetching answer blobs: {e}")
+            self.put(output, StageError(e))
+
+    def decode_stage(self, fetched, output):
+        try:
+            for chunk in self.iter_stage(fetched):
+                for format_name, frame in self.decode_chunk(chunk):
+                    if not self.put(output, (format_name, frame)):
+                        return
+            self.put(output, END_OF_STREAM)
+        except UpstreamFailed as e:
+            self.put(output, e.stage_error)  # Already logged by the failed stage
+        except Exception as e:
+            logging.error(f"Error decoding answer blobs: {e}")
+            self.put(output, StageError(e))
+
+    def decode_chunk(self, chunk):
+        """Decode a chunk of answer rows into one frame per format (and RAT test)."""
+        decode_start = time.perf_counter()
+        frames = []
+        groups = chunk.groupby([FORMAT_COLUMN, chunk[TEST_COLUMN].fillna("")], sort=False)
+        for (format_name, test_id), rows in groups:
+            if format_name not in HELPER_FACTORIES:
+                logging.warning(f"Skipping {len(rows)} answer blobs of unknown format {format_name}")
+                continue
+            frame = parse_all_candidates(HELPER_FACTORIES[format_name](test_id), list(rows[BLOB_COLUMN]),
+                                         rows[CANDIDATE_COLUMN].to_numpy())
+            self.stats["Items"] += len(frame)
+            frames.append((format_name, frame))
+        self.stats["DecodeSeconds"] += time.perf_counter() - decode_start
+        return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the fetch → decode → aggregate pipeline and time it.")
+    parser.add_argument("--query", default=ANSWERS_QUERY)
+    parser.add_argument("--chunk-rows", type=int, default=PIPELINE_CHUNK_ROWS)
+    parser.add_argument("--queue-chunks", type=int, default=PIPELINE_QUEUE_CHUNKS)
+    args = parser.parse_args(argv)
+
+    with DatabaseConnection() as db_connection:
+        pipeline = AnswerPipeline(db_connection, chunk_rows=args.chunk_rows, queue_chunks=args.queue_chunks,
+                                  query=args.query)
+        results = pipeline.run()
+
+    stats = pipeline.stats
+    print(f"{stats['Rows']:,} blobs, {stats['Items']:,} items in {stats['Seconds']:.2f}s "
+          f"({stats['Items'] / stats['Seconds']:,.0f} items/sec)")
+    print(f"fetch {stats['FetchSeconds']:.2f}s, decode {stats['DecodeSeconds']:.2f}s, "
+          f"aggregate {stats['AggregateSeconds']:.2f}s")
+    for format_name, mean in results["MeanTimeSpent"].items():
+        print(f"{format_name}: mean TimeSpent {mean:.1f}")
+    print(results["CompetencyScores"].head())
+
+
+if __name__ == "__main__":
+    main()
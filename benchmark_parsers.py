@@ -0,0 +1,170 @@
+# benchmark_parsers.py
+#
+# Benchmarks the BinaryParsers decoders on synthetic blobs. Runs offline and writes one JSON
+# record per (format, size, method) so results of two runs can be compared:
+#
+#   python benchmark_parsers.py --sizes 1 1000 100000 --output results.jsonl
+#   python benchmark_parsers.py --sizes 1 1000 100000 --compare results.jsonl
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from BinaryParsers import parse_all_candidates
+from synthetic_blobs import FORMATS, generate_blob, generate_blobs, make_helper
+
+DEFAULT_SIZES = [1, 1_000, 100_000]
+DEFAULT_MAX_LOOP_ITEMS = 100_000  # parse_item loops are skipped above this size
+BULK_ITEMS_PER_CANDIDATE = 100
+
+
+def run_parse_item_loop(format_name, blob):
+    helper = make_helper(format_name, blob)
+    for item_index in range(1, helper.total_items + 1):
+        if helper.parse_item(item_index) is None:
+            break
+
+
+def run_iter_items(format_name, blob):
+    for _ in make_helper(format_name, blob).iter_items():
+        pass
+
+
+def run_parse_all(format_name, blob):
+    make_helper(format_name, blob).parse_all(use_cache=False)
+
+
+def run_parse_all_candidates(format_name, blobs):
+    parse_all_candidates(FORMATS[format_name][0], blobs, np.arange(len(blobs)))
+
+
+def measure(run, repeat):
+    # Best wall time of `repeat` runs, then one extra run under tracemalloc for the peak memory,
+    # so the tracing overhead never shows up in the timings
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(timings), peak_bytes
+
+
+def benchmark_format(format_name, item_count, args):
+    blob = generate_blob(format_name, item_count, seed=args.seed)
+    methods = {
+        "iter_items": lambda: run_iter_items(format_name, blob),
+        "parse_all": lambda: run_parse_all(format_name, blob)
+    }
+    if item_count <= args.max_loop_items:
+        methods = {"parse_item": lambda: run_parse_item_loop(format_name, blob), **methods}
+    if item_count >= BULK_ITEMS_PER_CANDIDATE:
+        # The same items split over candidates of BULK_ITEMS_PER_CANDIDATE items each
+        blobs = generate_blobs(format_name, item_count // BULK_ITEMS_PER_CANDIDATE, BULK_ITEMS_PER_CANDIDATE,
+                               seed=args.seed)
+        methods["parse_all_candidates"] = lambda: run_parse_all_candidates(format_name, blobs)
+
+    results = []
+    for method, run in methods.items():
+        # BAQ prints a warning per mismatching item; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, peak_bytes = measure(run, args.repeat)
+        results.append({
+            "format": format_name,
+            "items": item_count,
+            "method": method,
+            "seconds": seconds,
+            "items_per_sec": item_count / seconds if seconds else None,
+            "us_per_item": seconds * 1e6 / item_count,
+            "peak_bytes": peak_bytes
+        })
+    return results
+
+
+def get_environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine()
+    }
+
+
+def load_results(path):
+    with open(path) as results_file:
+        records = [json.loads(line) for line in results_file if line.strip()]
+    return {(r["format"], r["items"], r["method"]): r for r in records if "method" in r}
+
+
+def print_report(results, baseline=None):
+    header = f"{'format':<16}{'items':>10}  {'method':<22}{'items/sec':>14}{'us/item':>12}{'peak MB':>10}"
+    if baseline is not None:
+        header += f"{'vs base':>10}"
+    print(header, file=sys.stderr)
+
+    for result in results:
+        # Runs below the timer resolution take zero seconds and have no rate
+        items_per_sec = result['items_per_sec']
+        line = (f"{result['format']:<16}{result['items']:>10}  {result['method']:<22}"
+                + (f"{items_per_sec:>14,.0f}" if items_per_sec is not None else f"{'-':>14}")
+                + f"{result['us_per_item']:>12.3f}{result['peak_bytes'] / 1e6:>10.2f}")
+        if baseline is not None:
+            base = baseline.get((result["format"], result["items"], result["method"]))
+            # > 1.00x means faster than the baseline run
+            if base and result['seconds']:
+                line += f"{base['seconds'] / result['seconds']:>9.2f}x"
+            else:
+                line += f"{'-':>10}"
+        print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BinaryParsers decoders on synthetic blobs.")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help="Items per blob (1 up to 10000000).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per method; the best one is kept.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-loop-items", type=int, default=DEFAULT_MAX_LOOP_ITEMS,
+                        help="Skip the per-item parse_item loop for larger blobs.")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout.")
+    parser.add_argument("--compare", help="JSON lines of an earlier run to compare against.")
+    args = parser.parse_args(argv)
+
+    baseline = load_results(args.compare) if args.compare else None
+    environment = get_environment()
+
+    results = []
+    for format_name in args.formats:
+        for item_count in args.sizes:
+            results.extend(benchmark_format(format_name, item_count, args))
+
+    print_report(results, baseline)
+
+    lines = [json.dumps({"environment": environment})]
+    lines += [json.dumps({**result, "seed": args.seed}) for result in results]
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write("\n".join(lines) + "\n")
+    else:
+        print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# charts.py
+#
+# Chart rendering shared by the analyst and developer dashboards. Every chart is rendered to
+# PNG once per (chart type, data, size, theme) and the bytes are cached for all sessions, so
+# showing a chart, downloading it and switching back to it later cost no rendering at all.
+#
+# Figures are built with the object-oriented Figure API on an Agg canvas, never through
+# pyplot: pyplot keeps every figure in a global registry until it is closed and draws into a
+# shared "current figure", which leaks memory and mixes up charts of concurrent sessions.
+
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from io import BytesIO
+
+import numpy as np
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+
+from downsampling import bin_scatter, downsample_line
+
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CHART_SIZE = (5, 3)  # Inches
+CHART_DPI = 200
+
+# Large datasets are reduced to what the chart's pixels can show before drawing
+LINE_POINTS_PER_PIXEL = 2  # LTTB keeps about two points per horizontal pixel
+SCATTER_MAX_POINTS = 20_000  # Larger scatter plots are drawn as a grid of point counts
+SCATTER_CELL_PIXELS = 4  # Width and height of one grid cell
+
+# rcParams that change how a chart looks; part of every cache key
+THEME_PARAMS = ("font.family", "font.sans-serif", "font.size", "axes.prop_cycle", "axes.facecolor",
+                "figure.facecolor", "text.color", "axes.labelcolor", "xtick.color", "ytick.color")
+
+
+def get_data_fingerprint(*arrays):
+    """Hash the contents, shapes and dtypes of the arrays a chart is drawn from."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+def get_theme_key():
+    return repr([(name, matplotlib.rcParams[name]) for name in THEME_PARAMS])
+
+
+def get_process_memory():
+    # Resident memory of this process in bytes, where the platform exposes it
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class FigureFactory:
+    """Creates figures outside pyplot and guarantees they are released after rendering.
+
+    Counts the figures in use and the figures still alive in memory, so a leak shows up as
+    AliveFigures growing while LiveFigures stays at zero.
+    """
+
+    def __init__(self):
+        self.live_figures = 0
+        self.peak_live_figures = 0
+        self.created = 0
+        self.alive = weakref.WeakSet()  # Figures not yet garbage collected
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def figure(self, size):
+        fig = Figure(figsize=size)
+        FigureCanvasAgg(fig)  # Attaches itself to the figure
+        with self.lock:
+            self.live_figures += 1
+            self.peak_live_figures = max(self.peak_live_figures, self.live_figures)
+            self.created += 1
+            self.alive.add(fig)
+        try:
+            yield fig
+        finally:
+            # Drop the artists and data right away instead of waiting for the garbage collector
+            fig.clear()
+            with self.lock:
+                self.live_figures -= 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "LiveFigures": self.live_figures,
+                "PeakLiveFigures": self.peak_live_figures,
+                "CreatedFigures": self.created,
+                "AliveFigures": len(self.alive),
+                "ProcessMemory": get_process_memory()
+            }
+
+
+# Shared by every session of the Streamlit process
+figure_factory = FigureFactory()
+
+
+class ChartCache:
+    # Process-wide cache of rendered charts as PNG bytes. The least recently used charts are
+    # evicted once the cached images exceed max_bytes.
+
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        with self.lock:
+            png = self.entries.get(key)
+            if png is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+
+        # Render outside the lock so other sessions are not blocked
+        png = render()
+        self.put(key, png)
+        return png
+
+    def put(self, key, png):
+        if len(png) > self.max_bytes:
+            return  # Never cache an entry that would evict everything else
+
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = png
+            self.total_bytes += len(png)
+
+            while self.total_bytes > self.max_bytes:
+                _, evicted_png = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted_png)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Evictions": self.evictions,
+                "Entries": len(self.entries),
+                "Bytes": self.total_bytes,
+                "MaxBytes": self.max_bytes
+            }
+
+
+# Shared by every session of the Streamlit process
+chart_cache = ChartCache()
+
+
+def render_png(draw, size, *data):
+    """Draw a chart on a fresh figure and rasterize it to PNG bytes."""
+    with figure_factory.figure(size) as fig:
+        draw(fig.add_subplot(), *data)
+        buf = BytesIO()
+        fig.savefig(buf, format="png", dpi=CHART_DPI, bbox_inches="tight")
+        return buf.getvalue()
+
+
+def get_chart_pixels(ax):
+    width, height = ax.figure.get_size_inches() * CHART_DPI
+    return int(width), int(height)
+
+
+def draw_line_chart(ax, x, data_key):
+    max_points = get_chart_pixels(ax)[0] * LINE_POINTS_PER_PIXEL
+    for name, function, color in (("sin", np.sin, 'blue'), ("cos", np.cos, 'green')):
+        line_x, line_y = downsample_line((data_key, name), x, function(x), max_points)
+        ax.plot(line_x, line_y, color=color, label=f'{name}(x)')
+    ax.legend()
+
+
+def draw_bar_chart(ax, bar_x):
+    ax.bar(bar_x, bar_x * 10)
+    ax.set_xlabel('Categories')
+    ax.set_ylabel('Values')
+
+
+def draw_horizontal_bar_chart(ax, bar_x):
+    ax.barh(bar_x, bar_x * 10)
+    ax.set_xlabel('Values')
+    ax.set_ylabel('Categories')
+
+
+def draw_scatter_plot(ax, scatter_x, scatter_y, data_key):
+    if len(scatter_x) > SCATTER_MAX_POINTS:
+        # Too many points to tell apart: show how many fall in each cell instead
+        width, height = get_chart_pixels(ax)
+        counts, x_edges, y_edges = bin_scatter(data_key, scatter_x, scatter_y,
+                                               width // SCATTER_CELL_PIXELS, height // SCATTER_CELL_PIXELS)
+        mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap='Blues', norm=LogNorm())
+        ax.figure.colorbar(mesh, ax=ax, label='Points')
+    else:
+        ax.scatter(scatter_x, scatter_y, c='blue', alpha=0.5)
+    ax.set_xlabel('X-axis')
+    ax.set_ylabel('Y-axis')
+
+
+CHART_DRAWERS = {
+    "Line Chart": draw_line_chart,
+    "Bar Chart": draw_bar_chart,
+    "Horizontal Bar Chart": draw_horizontal_bar_chart,
+    "Scatter Plot": draw_scatter_plot
+}
+
+# Drawers that downsample their data; they also get its fingerprint, to cache the reduced points
+DOWNSAMPLED_CHARTS = {"Line Chart", "Scatter Plot"}
+
+
+def render_chart(chart_type, *data, size=CHART_SIZE):
+    """Return the PNG bytes of a chart, rendering it only if no session rendered it before."""
+    data_key = get_data_fingerprint(*data)
+    key = (chart_type, data_key, tuple(size), get_theme_key())
+    draw = CHART_DRAWERS[chart_type]
+    if chart_type in DOWNSAMPLED_CHARTS:
+        draw = partial(draw, data_key=data_key)
+    return chart_cache.get_or_render(key, lambda: render_png(draw, size, *data))
@@ -1,14 +1,32 @@
 import os
+import re
+import hashlib
 import logging
-import pyodbc
-from sshtunnel import SSHTunnelForwarder
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import pandas as pd
 from BinaryParsers import BinaryBaqHelper, BinaryFcaHelper, BinarySjtHelper
+from snapshot_store import quote_identifier
+from metrics import metrics
 import matplotlib.pyplot as plt
 import numpy as np
 from collections import defaultdict
 
+# The SQL Server drivers are only needed by the SQL Server backend
+try:
+    import pyodbc
+    from sshtunnel import SSHTunnelForwarder
+except ImportError:
+    pyodbc = None
+    SSHTunnelForwarder = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -28,57 +46,1049 @@ sql_database = os.getenv('SQL_DATABASE')
 sql_username = os.getenv('SQL_USERNAME')
 sql_password = os.getenv('SQL_PASSWORD')
 
-# Check for missing environment variables
+# Required by the SQL Server backend; checked when its tunnel is started
 required_env_vars = [
     ssh_hostname, ssh_username, ssh_password,
     sql_database, sql_username, sql_password
 ]
-if any(var is None for var in required_env_vars):
-    logging.error("Missing required environment variables.")
-    exit(1)
+
+# Database backend: 'sqlserver' (through the SSH tunnel) or 'sqlite' (local file, e.g. a synthetic
+# database created with `python synthetic_blobs.py --sqlite hudson.sqlite`)
+DB_BACKEND = os.getenv('DB_BACKEND', 'sqlserver')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'hudson.sqlite')
+
+# Connection pool settings
+POOL_MAX_CONNECTIONS = int(os.getenv('SQL_POOL_SIZE', 5))
+POOL_IDLE_TIMEOUT = 300  # Seconds an unused pooled connection stays open
+POOL_PING_AFTER = 30  # Idle seconds after which a pooled connection is pinged before reuse
+POOL_CHECKOUT_TIMEOUT = 30  # Seconds to wait for a free pooled connection
+SSH_KEEPALIVE = 30.0  # Seconds between SSH keepalive packets on the tunnel
+
+# Rows fetched per round-trip by the streaming query API
+FETCH_CHUNK_ROWS = 10000
+
+# Concurrent query executor settings
+QUERY_MAX_CONCURRENCY = POOL_MAX_CONNECTIONS  # More would only wait for a pooled connection
+QUERY_TIMEOUT = 60  # Default seconds a single query may run before it is cancelled
+
+# Query result cache settings
+QUERY_CACHE_TTL = 300  # Default seconds a cached result stays valid
+QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+QUERY_CACHE_SPILL_DIR = os.getenv('QUERY_CACHE_SPILL_DIR')  # Evicted results are pickled here when set
+QUERY_CACHE_SPILL_MAX_BYTES = int(os.getenv('QUERY_CACHE_SPILL_MAX_BYTES', 4 * 1024 * 1024 * 1024))
+
+# Warm-up at app start
+WARMUP_CONNECTIONS = int(os.getenv('WARMUP_CONNECTIONS', 2))  # Pooled connections opened ahead of use
+WARMUP_TIMEOUT = 60  # Seconds a page waits for the warm-up before connecting on its own
+WARMUP_RETRY_AFTER = 30  # Seconds before a failed warm-up is started again
+
+# Table browser settings
+SCHEMA_CACHE_TTL = 3600  # The table and column list rarely changes
+ROW_ESTIMATE_TTL = 300
+BROWSER_PAGE_TTL = 60
+BROWSER_PAGE_SIZE = 100
+
+# Operators a browser filter may use; values are always passed as parameters
+FILTER_OPERATORS = ("=", "<>", "<", "<=", ">", ">=", "LIKE", "IS NULL", "IS NOT NULL")
+NULL_OPERATORS = ("IS NULL", "IS NOT NULL")
+NUMERIC_TYPES = ("tinyint", "smallint", "int", "integer", "bigint", "decimal", "numeric", "float", "real", "money", "smallmoney")
+
+# Table names after FROM/JOIN, used to invalidate cached results by table
+TABLE_REFERENCE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+((?:\[[^\]]+\]|\w+)(?:\.(?:\[[^\]]+\]|\w+))*)', re.IGNORECASE)
+
+
+def start_ssh_tunnel():
+    """Start an SSH tunnel to the remote SQL server."""
+    tunnel = SSHTunnelForwarder(
+        (ssh_hostname, ssh_port),
+        ssh_username=ssh_username,
+        ssh_password=ssh_password,
+        remote_bind_address=(sql_hostname, sql_port),
+        local_bind_address=('127.0.0.1', sql_port),
+        set_keepalive=SSH_KEEPALIVE
+    )
+    with metrics.timer("tunnel.setup_seconds"):
+        tunnel.start()
+    logging.info("SSH tunnel established")
+    return tunnel
+
+
+def connect_sql(local_port):
+    """Open a connection to the SQL database through the tunnel's local port."""
+    connection_string = (
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER=127.0.0.1,{local_port};"
+        f"DATABASE={sql_database};"
+        f"UID={sql_username};"
+        f"PWD={sql_password}"
+    )
+    with metrics.timer("sql.connect_seconds"):
+        connection = pyodbc.connect(connection_string)
+    logging.info("SQL connection established")
+    return connection
+
+
+class SqlServerBackend:
+    """The production database: SQL Server behind an SSH tunnel, through ODBC Driver 17."""
+
+    name = "sqlserver"
+    table_names_query = "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'"
+
+    def check_settings(self):
+        if any(var is None for var in required_env_vars):
+            logging.error("Missing required environment variables.")
+            raise RuntimeError("Missing required environment variables.")
+        if pyodbc is None or SSHTunnelForwarder is None:
+            raise RuntimeError("pyodbc and sshtunnel are required for the SQL Server backend.")
+
+    def start_tunnel(self):
+        self.check_settings()
+        return start_ssh_tunnel()
+
+    def connect(self, tunnel):
+        return connect_sql(tunnel.local_bind_port)
+
+    def cancel(self, connection, cursor):
+        cursor.cancel()  # Asks the server to stop the running statement
+
+    def get_schema_query(self):
+        return SCHEMA_QUERY
+
+    def get_row_estimate_query(self, tables):
+        return ROW_ESTIMATE_QUERY
+
+    def build_limited_query(self, select_list, table, where, order_by, limit):
+        return f"SELECT TOP ({int(limit)}) {select_list} FROM {table}{where}{order_by}"
+
+
+class SqliteBackend:
+    """A local SQLite file, so the data path can be run and profiled offline without the tunnel."""
+
+    name = "sqlite"
+    table_names_query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+
+    def start_tunnel(self):
+        return None  # Nothing to tunnel to
+
+    def connect(self, tunnel):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"SQLite database not found at {self.path}. "
+                                    f"Create one with `python synthetic_blobs.py --sqlite {self.path}`.")
+        # Pooled connections are handed to whichever thread checks them out
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        logging.info("SQLite connection established")
+        return connection
+
+    def cancel(self, connection, cursor):
+        connection.interrupt()
+
+    def get_schema_query(self):
+        return SQLITE_SCHEMA_QUERY
+
+    def get_row_estimate_query(self, tables):
+        # The largest rowid is found from the end of the table's b-tree, without counting rows
+        return " UNION ALL ".join(
+            f"SELECT '{table_schema}' AS TABLE_SCHEMA, '{table_name}' AS TABLE_NAME, "
+            f"(SELECT MAX(_rowid_) FROM {quote_identifier(table_name)}) AS ROW_ESTIMATE"
+            for table_schema, table_name in tables
+        )
+
+    def build_limited_query(self, select_list, table, where, order_by, limit):
+        return f"SELECT {select_list} FROM {table}{where}{order_by} LIMIT {int(limit)}"
+
+
+BACKENDS = {
+    "sqlserver": SqlServerBackend,
+    "sqlite": SqliteBackend
+}
+
+# Process-wide backend, chosen by DB_BACKEND
+backend = None
+
+
+def get_backend():
+    """Return the configured database backend."""
+    global backend
+    if backend is None:
+        if DB_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown DB_BACKEND {DB_BACKEND}; use one of {', '.join(BACKENDS)}.")
+        backend = BACKENDS[DB_BACKEND]()
+    return backend
+
+
+class ConnectionPool:
+    """One long-lived SSH tunnel and a bounded pool of SQL connections shared by all sessions."""
+
+    def __init__(self, max_connections=POOL_MAX_CONNECTIONS, idle_timeout=POOL_IDLE_TIMEOUT,
+                 ping_after=POOL_PING_AFTER, checkout_timeout=POOL_CHECKOUT_TIMEOUT, backend=None):
+        self.backend = backend or get_backend()
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.checkout_timeout = checkout_timeout
+        self.tunnel = None
+        self.tunnel_generation = 0  # Incremented whenever the tunnel is replaced or closed
+        self.idle = deque()  # (connection, last used, tunnel generation), most recently used last
+        self.checked_out = {}  # id(connection) -> tunnel generation it was opened on
+        self.open_connections = 0  # Idle and checked-out connections
+        self.condition = threading.Condition()
+        self.tunnel_lock = threading.Lock()
+
+    def get_tunnel(self):
+        """Return the shared SSH tunnel, restarting it if it dropped."""
+        with self.tunnel_lock:
+            if self.tunnel is not None and not self.tunnel.is_active:
+                logging.warning("SSH tunnel dropped, reconnecting")
+                with self.condition:
+                    # Connections through the old tunnel are dead; checked-out ones are closed on checkin
+                    self.tunnel_generation += 1
+                self.discard_idle()
+                try:
+                    self.tunnel.close()
+                except Exception as e:
+                    logging.error(f"Error closing dropped SSH tunnel: {e}")
+                self.tunnel = None
+
+            if self.tunnel is None:
+                self.tunnel = self.backend.start_tunnel()
+            return self.tunnel
+
+    def checkout(self, timeout=None):
+        """Take a live SQL connection from the pool, opening one if the pool is not full."""
+        start = time.monotonic()
+        deadline = start + (timeout if timeout is not None else self.checkout_timeout)
+
+        with self.condition:
+            self.evict_idle()
+            while True:
+                if self.idle:
+                    connection, last_used, generation = self.idle.pop()
+                    break
+                if self.open_connections < self.max_connections:
+                    # Reserve a slot; the connection is opened outside the lock
+                    self.open_connections += 1
+                    connection, last_used, generation = None, None, None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.record("pool.checkout_wait_seconds", time.monotonic() - start)
+                    raise TimeoutError("No SQL connection available in the pool.")
+                self.condition.wait(remaining)
+        metrics.record("pool.checkout_wait_seconds", time.monotonic() - start)
+
+        try:
+            tunnel = self.get_tunnel()
+            with self.condition:
+                current_generation = self.tunnel_generation
+
+            # Connections opened through an earlier tunnel are dead
+            if connection is not None and generation != current_generation:
+                self.close_connection(connection)
+                connection = None
+
+            # Ping connections that sat idle for a while; replace them if they are dead
+            if connection is not None and time.monotonic() - last_used > self.ping_after and not self.ping(connection):
+                logging.warning("Pooled SQL connection is dead, reconnecting")
+                self.close_connection(connection)
+                connection = None
+
+            if connection is None:
+                connection = self.backend.connect(tunnel)
+                generation = current_generation
+        except BaseException:
+            # An idle connection taken from the pool is not handed out, so close it with its slot
+            if connection is not None:
+                self.close_connection(connection)
+            with self.condition:
+                self.open_connections -= 1
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.checked_out[id(connection)] = generation
+        return connection
+
+    def checkin(self, connection, discard=False):
+        """Return a connection to the pool, or close it when it may be broken."""
+        with self.condition:
+            generation = self.checked_out.pop(id(connection), None)
+            if discard or generation != self.tunnel_generation:
+                # Broken, or opened through a tunnel that has since been replaced
+                self.close_connection(connection)
+                self.open_connections -= 1
+            else:
+                self.idle.append((connection, time.monotonic(), generation))
+            self.evict_idle()
+            self.condition.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of a with-block."""
+        connection = self.checkout(timeout)
+        completed = False
+        try:
+            yield connection
+            completed = True
+        finally:
+            # The connection may be unusable after an error, or after the block was abandoned
+            # (GeneratorExit, KeyboardInterrupt); do not hand it out again. The slot is always returned.
+            self.checkin(connection, discard=not completed)
+
+    def ping(self, connection):
+        """Check that a connection still reaches the server."""
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def evict_idle(self):
+        """Close connections that have been idle longer than the idle timeout."""
+        with self.condition:
+            now = time.monotonic()
+            while self.idle and now - self.idle[0][1] > self.idle_timeout:
+                connection, _, _ = self.idle.popleft()
+                self.close_connection(connection)
+                self.open_connections -= 1
+
+    def discard_idle(self):
+        """Close every idle connection."""
+        with self.condition:
+            while self.idle:
+                connection, _, _ = self.idle.popleft()
+                self.close_connection(connection)
+                self.open_connections -= 1
+            self.condition.notify_all()
+
+    def close_connection(self, connection):
+        try:
+            connection.close()
+            logging.info("SQL connection closed")
+        except Exception as e:
+            logging.error(f"Error closing SQL connection: {e}")
+
+    def stats(self):
+        with self.condition:
+            return {
+                "OpenConnections": self.open_connections,
+                "IdleConnections": len(self.idle),
+                "MaxConnections": self.max_connections,
+                "TunnelActive": self.tunnel is not None and getattr(self.tunnel, "is_active", True)
+            }
+
+    def close(self):
+        """Close the idle connections and the SSH tunnel."""
+        with self.condition:
+            self.tunnel_generation += 1  # Checked-out connections are closed on checkin
+        self.discard_idle()
+        with self.tunnel_lock:
+            if self.tunnel is not None:
+                self.tunnel.close()
+                self.tunnel = None
+                logging.info("SSH tunnel closed")
+
+
+# Process-wide pool, shared by every Streamlit session
+connection_pool = None
+connection_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global connection_pool
+    with connection_pool_lock:
+        if connection_pool is None:
+            connection_pool = ConnectionPool()
+        return connection_pool
+
+
+def record_query_metrics(execute_seconds, frames):
+    """Record the execution time and the rows and bytes fetched by one query."""
+    metrics.record("query.execute_seconds", execute_seconds)
+    metrics.record("query.rows", sum(len(frame) for frame in frames))
+    metrics.record("query.bytes", sum(int(frame.memory_usage(index=False, deep=True).sum()) for frame in frames))
+
+
+def rows_to_frame(rows, columns, dtypes=None):
+    """Build a DataFrame column by column, using the preset dtypes where given."""
+    dtypes = dtypes or {}
+    data = {}
+    for name, values in zip(columns, zip(*rows)):
+        if name in dtypes:
+            data[name] = pd.Series(values, dtype=dtypes[name])
+        else:
+            data[name] = pd.Series(values)
+    return pd.DataFrame(data, columns=columns)
+
+
+class QueryBatchError(Exception):
+    """Raised when queries of a batch failed; the other results are still available."""
+
+    def __init__(self, errors, results):
+        super().__init__(f"{len(errors)} queries failed: {', '.join(errors)}")
+        self.errors = errors
+        self.results = results
+
+
+class RunningQuery:
+    """Cancellation handle for one query of a batch."""
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.cancel_statement = None  # Set once the query is running on a connection
+        self.cancelled = False
+        self.timed_out = False
+        self.lock = threading.Lock()
+
+    def cancel(self, timed_out=False):
+        with self.lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.timed_out = timed_out
+            if self.cancel_statement is not None:
+                try:
+                    self.cancel_statement()
+                except Exception as e:
+                    logging.error(f"Error cancelling query {self.name}: {e}")
+
+
+class QueryBatch:
+    """A batch of queries submitted to the QueryExecutor."""
+
+    def __init__(self, futures, running_queries):
+        self.futures = futures
+        self.running_queries = running_queries
+
+    def cancel(self):
+        """Cancel every query of the batch that has not finished yet."""
+        for name, future in self.futures.items():
+            if future.done():
+                continue
+            future.cancel()
+            self.running_queries[name].cancel()
+
+    def result(self):
+        """Wait for every query and return {name: DataFrame}."""
+        results, errors = {}, {}
+        for name, future in self.futures.items():
+            try:
+                results[name] = future.result()
+            except CancelledError:
+                errors[name] = CancelledError(f"Query {name} was cancelled.")
+            except Exception as e:
+                errors[name] = e
+
+        if errors:
+            for name, error in errors.items():
+                logging.error(f"Error running query {name}: {error}")
+            raise QueryBatchError(errors, results)
+        return results
+
+
+class QueryExecutor:
+    """Run batches of independent queries concurrently on pooled connections.
+
+    Queries run on threads: pyodbc releases the GIL while it waits for the server, so a
+    page's latency becomes roughly that of its slowest query instead of the sum.
+    """
+
+    def __init__(self, pool=None, max_concurrency=QUERY_MAX_CONCURRENCY, timeout=QUERY_TIMEOUT):
+        self.pool = pool or get_connection_pool()
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="query")
+
+    def submit(self, queries, timeout=None):
+        """Start a batch. `queries` maps a name to SQL text or a (SQL, params) pair."""
+        futures, running_queries = {}, {}
+        for name, query in queries.items():
+            query, params = query if isinstance(query, tuple) else (query, None)
+            running_queries[name] = RunningQuery(name, timeout if timeout is not None else self.timeout)
+            futures[name] = self.executor.submit(self.run_query, running_queries[name], query, params)
+        return QueryBatch(futures, running_queries)
+
+    def run(self, queries, timeout=None):
+        """Run a batch and return {name: DataFrame} once every query has finished."""
+        return self.submit(queries, timeout).result()
+
+    def run_query(self, running_query, query, params):
+        if running_query.cancelled:
+            raise CancelledError(f"Query {running_query.name} was cancelled.")
+
+        # Cancel the statement on the server once it runs longer than its timeout
+        watchdog = threading.Timer(running_query.timeout, running_query.cancel, kwargs={"timed_out": True})
+        watchdog.daemon = True
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                with running_query.lock:
+                    running_query.cancel_statement = lambda: self.pool.backend.cancel(connection, cursor)
+                watchdog.start()
+
+                try:
+                    execute_start = time.perf_counter()
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                    execute_seconds = time.perf_counter() - execute_start
+                    columns = [column[0] for column in cursor.description]
+                    frame = rows_to_frame(cursor.fetchall(), columns)
+                    cursor.close()
+                    record_query_metrics(execute_seconds, [frame])
+                    return frame
+                finally:
+                    # Before the connection goes back to the pool, where a late cancel would hit
+                    # the next query running on it
+                    watchdog.cancel()
+                    with running_query.lock:
+                        running_query.cancel_statement = None
+        except Exception:
+            if running_query.timed_out:
+                raise TimeoutError(f"Query {running_query.name} timed out after {running_query.timeout} seconds.")
+            if running_query.cancelled:
+                raise CancelledError(f"Query {running_query.name} was cancelled.")
+            raise
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Process-wide query executor, shared by every Streamlit session
+query_executor = None
+query_executor_lock = threading.Lock()
+
+
+def get_query_executor():
+    """Return the process-wide query executor, creating it on first use."""
+    global query_executor
+    # Runs on the registered pool, so the process never opens a second tunnel on the same port
+    pool = get_connection_pool()
+    with query_executor_lock:
+        if query_executor is None:
+            query_executor = QueryExecutor(pool)
+        return query_executor
+
+
+def normalize_sql(query):
+    """Collapse whitespace and drop a trailing semicolon, leaving string literals untouched."""
+    parts = query.strip().rstrip(';').split("'")
+    # Even parts are outside quotes; odd parts are the contents of string literals
+    for idx in range(0, len(parts), 2):
+        parts[idx] = re.sub(r'\s+', ' ', parts[idx])
+    return "'".join(parts).strip()
+
+
+def normalize_table_name(table):
+    # [dbo].[Answers], dbo.Answers and answers all invalidate the same results
+    return table.split('.')[-1].strip('[]').lower()
+
+
+def get_referenced_tables(query):
+    return {normalize_table_name(table) for table in TABLE_REFERENCE_PATTERN.findall(query)}
+
+
+class QueryCache:
+    # Process-wide cache of query results, keyed by the normalized SQL text and its parameters.
+    # Every entry has its own TTL. The least recently used results are evicted once the cached
+    # frames exceed max_bytes, and are pickled to spill_dir instead of dropped when it is set.
+    # Concurrent requests for the same result share one round-trip to the server.
+    # Disk I/O for spilled results never happens while the lock is held.
+
+    def __init__(self, max_bytes=QUERY_CACHE_MAX_BYTES, spill_dir=QUERY_CACHE_SPILL_DIR,
+                 spill_max_bytes=QUERY_CACHE_SPILL_MAX_BYTES, ttl=QUERY_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (frame, nbytes, expires, tables)
+        self.spilled = OrderedDict()  # key -> (path, nbytes, expires, tables)
+        self.in_flight = {}  # key -> Future of the running query
+        # Bumped by invalidate (per table) and clear (all), so results produced or spilled
+        # while a table changed are never stored
+        self.table_generations = {}
+        self.generation = 0
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def make_key(self, query, params=None):
+        text = repr((normalize_sql(query), tuple(params) if params else ()))
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def get_or_run(self, query, run, params=None, ttl=None, tables=None):
+        """Return the cached result of a query, or call run() once to produce it.
+
+        `tables` lists the tables the result depends on; by default they are read from the
+        FROM/JOIN clauses. Results are shared between sessions and must not be modified.
+        """
+        key = self.make_key(query, params)
+        if tables is None:
+            tables = get_referenced_tables(query)
+        tables = {normalize_table_name(table) for table in tables}
+
+        with self.lock:
+            frame = self.lookup(key)
+            if frame is not None:
+                self.hits += 1
+                return frame
+
+            spilled_entry = self.spilled.pop(key, None)
+            if spilled_entry is not None:
+                self.spilled_bytes -= spilled_entry[1]
+                generations = self.get_generations(spilled_entry[3])
+            else:
+                future = self.in_flight.get(key)
+                if future is not None:
+                    self.coalesced += 1
+                    owner = False
+                else:
+                    self.misses += 1
+                    future = self.in_flight[key] = Future()
+                    owner = True
+                generations = self.get_generations(tables)
+
+        if spilled_entry is not None:
+            frame = self.load_spilled(key, spilled_entry, generations)
+            if frame is not None:
+                return frame
+            # Expired, unreadable or invalidated meanwhile: run the query like any other miss
+            return self.get_or_run(query, run, params, ttl, tables)
+
+        if not owner:
+            return future.result()
+
+        # Run outside the lock so other queries are not blocked. The Future is always resolved
+        # and the in-flight entry always removed, or coalesced callers would wait forever.
+        try:
+            frame = run()
+        except BaseException as e:
+            self.finish(key, future, exception=e)
+            raise
+
+        try:
+            self.put(key, frame, ttl if ttl is not None else self.ttl, tables, generations)
+        except Exception as e:
+            logging.error(f"Error caching query result: {e}")
+        finally:
+            self.finish(key, future, result=frame)
+        return frame
+
+    def finish(self, key, future, result=None, exception=None):
+        with self.lock:
+            self.in_flight.pop(key, None)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def get_generations(self, tables):
+        # Called with the lock held
+        return self.generation, {table: self.table_generations.get(table, 0) for table in tables}
+
+    def lookup(self, key):
+        # Called with the lock held
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[2] > time.monotonic():
+                self.entries.move_to_end(key)
+                return entry[0]
+            self.drop_entry(key)
+        return None
+
+    def load_spilled(self, key, spilled_entry, generations):
+        """Read a spilled result back into memory; returns None if it is no longer usable."""
+        path, nbytes, expires, tables = spilled_entry
+        frame = None
+        try:
+            if expires > time.monotonic():
+                with open(path, 'rb') as spill_file:
+                    frame = pickle.load(spill_file)
+        except Exception as e:
+            logging.error(f"Error reading spilled query result: {e}")
+        finally:
+            self.remove_spill_file(path)
+        if frame is None:
+            return None
+
+        with self.lock:
+            if self.get_generations(tables) != generations:
+                return None  # Invalidated while it was read
+            self.hits += 1
+            if key in self.entries:
+                self.drop_entry(key)
+            spills = self.store(key, frame, nbytes, expires, tables)
+        self.spill_all(spills)
+        return frame
+
+    def put(self, key, frame, ttl, tables=(), generations=None):
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return  # Never cache an entry that would evict everything else
+
+        with self.lock:
+            if generations is not None and self.get_generations(generations[1]) != generations:
+                return  # A table was invalidated while the query ran; the result may be stale
+            if key in self.entries:
+                self.drop_entry(key)
+            spills = self.store(key, frame, nbytes, time.monotonic() + ttl, set(tables))
+        self.spill_all(spills)
+
+    def store(self, key, frame, nbytes, expires, tables):
+        # Called with the lock held. Returns the evicted results to spill once it is released.
+        self.entries[key] = (frame, nbytes, expires, tables)
+        self.total_bytes += nbytes
+
+        spills = []
+        while self.total_bytes > self.max_bytes:
+            evicted_key, (evicted_frame, evicted_nbytes, evicted_expires, evicted_tables) = \
+                self.entries.popitem(last=False)
+            self.total_bytes -= evicted_nbytes
+            self.evictions += 1
+            if self.spill_dir and evicted_expires > time.monotonic():
+                spills.append((evicted_key, evicted_frame, evicted_nbytes, evicted_expires, evicted_tables,
+                               self.get_generations(evicted_tables)))
+        return spills
+
+    def spill_all(self, spills):
+        for spill in spills:
+            self.spill(*spill)
+
+    def spill(self, key, frame, nbytes, expires, tables, generations):
+        # Called without the lock: pickling a large frame would block every session
+        try:
+            fd, path = tempfile.mkstemp(prefix=f"{key}-", suffix=".pkl", dir=self.spill_dir)
+        except Exception as e:
+            logging.error(f"Error spilling query result to disk: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'wb') as spill_file:
+                pickle.dump(frame, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logging.error(f"Error spilling query result to disk: {e}")
+            self.remove_spill_file(path)
+            return
+
+        removed_paths = []
+        with self.lock:
+            if self.get_generations(tables) != generations or key in self.entries:
+                # Invalidated meanwhile, or already cached again in memory
+                removed_paths.append(path)
+            else:
+                if key in self.spilled:
+                    old_path, old_nbytes, _, _ = self.spilled.pop(key)
+                    self.spilled_bytes -= old_nbytes
+                    removed_paths.append(old_path)
+                self.spilled[key] = (path, nbytes, expires, tables)
+                self.spilled_bytes += nbytes
+                while self.spilled_bytes > self.spill_max_bytes:
+                    _, (old_path, old_nbytes, _, _) = self.spilled.popitem(last=False)
+                    self.spilled_bytes -= old_nbytes
+                    removed_paths.append(old_path)
+
+        for removed_path in removed_paths:
+            self.remove_spill_file(removed_path)
+
+    def drop_entry(self, key):
+        # Called with the lock held
+        _, nbytes, _, _ = self.entries.pop(key)
+        self.total_bytes -= nbytes
+
+    def remove_spill_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def invalidate(self, table):
+        """Drop every cached result that reads from the given table."""
+        table = normalize_table_name(table)
+        removed_paths = []
+        with self.lock:
+            self.table_generations[table] = self.table_generations.get(table, 0) + 1
+            for key in [key for key, entry in self.entries.items() if table in entry[3]]:
+                self.drop_entry(key)
+            for key in [key for key, entry in self.spilled.items() if table in entry[3]]:
+                path, nbytes, _, _ = self.spilled.pop(key)
+                self.spilled_bytes -= nbytes
+                removed_paths.append(path)
+
+        for path in removed_paths:
+            self.remove_spill_file(path)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.total_bytes = 0
+            removed_paths = [path for path, _, _, _ in self.spilled.values()]
+            self.spilled.clear()
+            self.spilled_bytes = 0
+
+        for path in removed_paths:
+            self.remove_spill_file(path)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Coalesced": self.coalesced,
+                "Evictions": self.evictions,
+                "Entries": len(self.entries),
+                "Bytes": self.total_bytes,
+                "MaxBytes": self.max_bytes,
+                "SpilledEntries": len(self.spilled),
+                "SpilledBytes": self.spilled_bytes
+            }
+
+
+# Shared by every session of the Streamlit process
+query_cache = QueryCache()
+
+
+# One page of a browsed table; next_key is the key to pass as `after` for the next page,
+# or None on the last page
+TablePage = namedtuple("TablePage", ["rows", "next_key"])
+
+SCHEMA_QUERY = """
+SELECT c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.ORDINAL_POSITION,
+       k.ORDINAL_POSITION AS KEY_POSITION
+FROM INFORMATION_SCHEMA.COLUMNS c
+JOIN INFORMATION_SCHEMA.TABLES t
+    ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+LEFT JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+    ON tc.TABLE_SCHEMA = c.TABLE_SCHEMA AND tc.TABLE_NAME = c.TABLE_NAME AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+    ON k.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND k.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+    AND k.COLUMN_NAME = c.COLUMN_NAME
+WHERE t.TABLE_TYPE = 'BASE TABLE'
+ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+SQLITE_SCHEMA_QUERY = """
+SELECT 'main' AS TABLE_SCHEMA, m.name AS TABLE_NAME, p.name AS COLUMN_NAME, lower(p.type) AS DATA_TYPE,
+       p.cid + 1 AS ORDINAL_POSITION, NULLIF(p.pk, 0) AS KEY_POSITION
+FROM sqlite_master m
+JOIN pragma_table_info(m.name) p
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+ORDER BY m.name, p.cid
+"""
+
+# Row counts from the partition metadata (heap or clustered index only), so no table is scanned
+ROW_ESTIMATE_QUERY = """
+SELECT s.name AS TABLE_SCHEMA, t.name AS TABLE_NAME, SUM(p.rows) AS ROW_ESTIMATE
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+GROUP BY s.name, t.name
+"""
+
+
+def to_query_param(value):
+    # pyodbc cannot bind NumPy scalars or pandas timestamps
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+class TableBrowser:
+    """Browse table contents page by page without pulling whole tables.
+
+    Pages are read by keyset pagination on the primary key: each page continues after the
+    last key of the previous one, so the server seeks the key index instead of skipping
+    OFFSET rows, and every page costs the same however large the table is.
+    """
+
+    def __init__(self, db_connection):
+        self.db_connection = db_connection
+        self.backend = db_connection.backend
+
+    def get_schema(self):
+        """Return the columns of every base table, with their primary key position."""
+        return self.db_connection.cached_query(self.backend.get_schema_query(), ttl=SCHEMA_CACHE_TTL)
+
+    def get_row_estimates(self):
+        tables = self.get_schema()[["TABLE_SCHEMA", "TABLE_NAME"]].drop_duplicates()
+        query = self.backend.get_row_estimate_query(list(tables.itertuples(index=False, name=None)))
+        return self.db_connection.cached_query(query, ttl=ROW_ESTIMATE_TTL)
+
+    def get_tables(self):
+        """Return one row per table: TableName (schema.table), KeyColumns and RowEstimate."""
+        schema = self.get_schema()
+        keys = schema[schema["KEY_POSITION"].notna()].sort_values("KEY_POSITION")
+        key_columns = keys.groupby(["TABLE_SCHEMA", "TABLE_NAME"])["COLUMN_NAME"].agg(list)
+
+        tables = schema[["TABLE_SCHEMA", "TABLE_NAME"]].drop_duplicates().set_index(["TABLE_SCHEMA", "TABLE_NAME"])
+        tables["KeyColumns"] = key_columns.reindex(tables.index)
+        tables["KeyColumns"] = tables["KeyColumns"].apply(lambda columns: columns if isinstance(columns, list) else [])
+
+        try:
+            estimates = self.get_row_estimates().set_index(["TABLE_SCHEMA", "TABLE_NAME"])["ROW_ESTIMATE"]
+            tables["RowEstimate"] = estimates.reindex(tables.index)
+        except Exception as e:
+            logging.error(f"Error fetching row estimates: {e}")
+            tables["RowEstimate"] = None
+
+        tables = tables.reset_index()
+        tables.insert(0, "TableName", tables["TABLE_SCHEMA"] + "." + tables["TABLE_NAME"])
+        return tables
+
+    def get_columns(self, table):
+        """Return the schema rows of one schema.table, in column order."""
+        schema = self.get_schema()
+        table_schema, table_name = table.split('.', 1)
+        return schema[(schema["TABLE_SCHEMA"] == table_schema) & (schema["TABLE_NAME"] == table_name)]
+
+    def convert_filter_value(self, value, data_type):
+        # Filter values come from text inputs; compare numeric columns with numbers
+        if data_type in NUMERIC_TYPES and isinstance(value, str):
+            return float(value) if '.' in value or data_type in ("float", "real") else int(value)
+        return value
+
+    def build_filter_clause(self, table, filters):
+        """Turn (column, operator, value) filters into a WHERE condition and its parameters."""
+        data_types = dict(zip(*[self.get_columns(table)[name] for name in ("COLUMN_NAME", "DATA_TYPE")]))
+        clauses, params = [], []
+        for column, operator, value in filters:
+            if column not in data_types:
+                raise ValueError(f"Unknown column {column} in {table}.")
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+
+            if operator in NULL_OPERATORS:
+                clauses.append(f"{quote_identifier(column)} {operator}")
+            else:
+                clauses.append(f"{quote_identifier(column)} {operator} ?")
+                if operator != "LIKE":
+                    value = self.convert_filter_value(value, data_types[column])
+                params.append(value)
+        return clauses, params
+
+    def build_keyset_clause(self, key_columns, after):
+        # (k1 > ?) OR (k1 = ? AND k2 > ?) OR ... continues after the composite key `after`
+        clauses, params = [], []
+        for idx, column in enumerate(key_columns):
+            parts = [f"{quote_identifier(key)} = ?" for key in key_columns[:idx]]
+            parts.append(f"{quote_identifier(column)} > ?")
+            clauses.append("(" + " AND ".join(parts) + ")")
+            params.extend(to_query_param(value) for value in after[:idx + 1])
+        return "(" + " OR ".join(clauses) + ")", params
+
+    def build_page_query(self, table, key_columns, after=None, page_size=BROWSER_PAGE_SIZE, filters=None,
+                         columns=None):
+        select_list = ', '.join(quote_identifier(column) for column in columns) if columns else '*'
+        clauses, params = self.build_filter_clause(table, filters or [])
+        if after is not None:
+            keyset_clause, keyset_params = self.build_keyset_clause(key_columns, after)
+            clauses.append(keyset_clause)
+            params.extend(keyset_params)
+
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        order_by = " ORDER BY " + ", ".join(quote_identifier(column) for column in key_columns)
+        query = self.backend.build_limited_query(select_list, quote_identifier(table), where, order_by, page_size)
+        return query, params
+
+    def fetch_page(self, table, after=None, page_size=BROWSER_PAGE_SIZE, filters=None, columns=None,
+                   key_columns=None):
+        """Fetch the page of rows that follows the key `after` (None for the first page).
+
+        `filters` is a list of (column, operator, value) tuples, applied on the server.
+        `key_columns` defaults to the primary key; other columns must be unique together.
+        """
+        key_columns = list(key_columns or self.get_columns(table).dropna(subset=["KEY_POSITION"])
+                           .sort_values("KEY_POSITION")["COLUMN_NAME"])
+        if not key_columns:
+            raise ValueError(f"{table} has no primary key; choose key columns to page by.")
+        if columns:
+            # The key columns are needed to continue on the next page
+            columns = list(columns) + [column for column in key_columns if column not in columns]
+
+        query, params = self.build_page_query(table, key_columns, after, page_size, filters, columns)
+        rows = self.db_connection.cached_query(query, params or None, ttl=BROWSER_PAGE_TTL, tables=[table])
+
+        next_key = None
+        if len(rows) == page_size:
+            next_key = tuple(to_query_param(value) for value in rows[key_columns].iloc[-1])
+        return TablePage(rows, next_key)
+
 
 class DatabaseConnection:
-    def __init__(self):
+    def __init__(self, pool=None, backend=None):
+        # With a pool, the tunnel and connection are borrowed from it instead of opened per use
         self.tunnel = None
         self.connection = None
+        self.pool = pool
+        self.backend = pool.backend if pool is not None else backend or get_backend()
+
+    @classmethod
+    def pooled(cls):
+        """Create a connection that borrows from the process-wide pool."""
+        return cls(get_connection_pool())
+
+    def __enter__(self):
+        self.open_ssh_tunnel()
+        self.open_sql_connection()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_sql_connection()
+        self.close_ssh_tunnel()
 
     def open_ssh_tunnel(self):
         """Open an SSH tunnel to the remote server."""
-        self.tunnel = SSHTunnelForwarder(
-            (ssh_hostname, ssh_port),
-            ssh_username=ssh_username,
-            ssh_password=ssh_password,
-            remote_bind_address=(sql_hostname, sql_port),
-            local_bind_address=('127.0.0.1', sql_port)
-        )
-        self.tunnel.start()
-        logging.info("SSH tunnel established")
+        if self.pool is not None:
+            self.tunnel = self.pool.get_tunnel()
+            return
+
+        self.tunnel = self.backend.start_tunnel()
 
     def close_ssh_tunnel(self):
         """Close the SSH tunnel if it's open."""
+        if self.pool is not None:
+            self.tunnel = None  # The pool keeps its tunnel open
+            return
+
         if self.tunnel:
             self.tunnel.close()
             logging.info("SSH tunnel closed")
 
     def open_sql_connection(self):
         """Open a connection to the SQL database."""
-        connection_string = (
-            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-            f"SERVER=127.0.0.1,{self.tunnel.local_bind_port};"
-            f"DATABASE={sql_database};"
-            f"UID={sql_username};"
-            f"PWD={sql_password}"
-        )
-
         try:
-            self.connection = pyodbc.connect(connection_string)
-            logging.info("SQL connection established")
+            if self.pool is not None:
+                self.connection = self.pool.checkout()
+            else:
+                self.connection = self.backend.connect(self.tunnel)
         except Exception as e:
             logging.error(f"Error establishing SQL connection: {e}")
             return None
 
     def close_sql_connection(self):
         """Close the SQL connection if it's open."""
+        if self.pool is not None:
+            if self.connection:
+                self.pool.checkin(self.connection)
+                self.connection = None
+            return
+
         if self.connection:
             self.connection.close()
             logging.info("SQL connection closed")
@@ -90,14 +1100,154 @@ class DatabaseConnection:
             return []
 
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'")
-            tables = cursor.fetchall()
-            return [table[0] for table in tables]
+            tables = self.cached_query(self.backend.table_names_query, ttl=SCHEMA_CACHE_TTL)
+            return list(tables.iloc[:, 0])
         except Exception as e:
             logging.error(f"Error fetching table names: {e}")
             return []
+
+    def run_query(self, query, params=None, dtypes=None):
+        """Run a query and return the whole result as one DataFrame."""
+        if self.connection is None:
+            raise RuntimeError("SQL connection is not established.")
+
+        cursor = self.connection.cursor()
+        try:
+            execute_start = time.perf_counter()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            execute_seconds = time.perf_counter() - execute_start
+            columns = [column[0] for column in cursor.description]
+            frame = rows_to_frame(cursor.fetchall(), columns, dtypes)
+            record_query_metrics(execute_seconds, [frame])
+            return frame
+        except Exception as e:
+            logging.error(f"Error running query: {e}")
+            raise
+        finally:
+            cursor.close()
+
+    def cached_query(self, query, params=None, ttl=None, tables=None, dtypes=None):
+        """Run a query through the shared result cache (see QueryCache.get_or_run)."""
+        return query_cache.get_or_run(query, lambda: self.run_query(query, params, dtypes),
+                                      params=params, ttl=ttl, tables=tables)
+
+    def iter_query(self, query, params=None, chunk_size=FETCH_CHUNK_ROWS, dtypes=None):
+        """Run a query and yield the result as DataFrame chunks of at most chunk_size rows.
+
+        Rows are fetched with fetchmany, so memory stays flat regardless of the result size
+        and the first chunk is available before the whole result has been transferred.
+        `dtypes` maps column names to the dtype each chunk column is built with.
+        """
+        if self.connection is None:
+            raise RuntimeError("SQL connection is not established.")
+
+        dtypes = dtypes or {}
+        cursor = self.connection.cursor()
+        cursor.arraysize = chunk_size
+        rows_fetched, bytes_fetched = 0, 0
+        try:
+            execute_start = time.perf_counter()
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            metrics.record("query.execute_seconds", time.perf_counter() - execute_start)
+            columns = [column[0] for column in cursor.description]
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = rows_to_frame(rows, columns, dtypes)
+                rows_fetched += len(chunk)
+                bytes_fetched += int(chunk.memory_usage(index=False, deep=True).sum())
+                yield chunk
+
+            metrics.record("query.rows", rows_fetched)
+            metrics.record("query.bytes", bytes_fetched)
+        except Exception as e:
+            logging.error(f"Error streaming query results: {e}")
+            raise
+        finally:
+            cursor.close()
         
+# Readiness of the background warm-up, shared by every Streamlit session
+warmup_future = None
+warmup_failed_at = None  # time.monotonic() of the last failed warm-up
+
+
+def start_warmup(connections=WARMUP_CONNECTIONS, prime_queries=()):
+    """Warm up the tunnel, pool and schema cache in a background thread, once per process.
+
+    `prime_queries` are SQL strings or (SQL, params) pairs whose results are loaded into the
+    query cache. Returns a Future that is resolved once everything is ready. A failed warm-up
+    is started again after WARMUP_RETRY_AFTER seconds, e.g. once the database is reachable.
+    """
+    global warmup_future
+    with connection_pool_lock:
+        if warmup_future is not None and warmup_future.done() and warmup_future.exception() is not None \
+                and time.monotonic() - warmup_failed_at >= WARMUP_RETRY_AFTER:
+            warmup_future = None
+        if warmup_future is None:
+            warmup_future = Future()
+            threading.Thread(target=run_warmup, args=(warmup_future, connections, prime_queries),
+                             name="warmup", daemon=True).start()
+        return warmup_future
+
+
+def run_warmup(future, connections, prime_queries):
+    global warmup_failed_at
+    start = time.perf_counter()
+    try:
+        pool = get_connection_pool()
+        pool.get_tunnel()
+
+        # Open the connections together, then hand them all back to the pool as idle
+        opened = []
+        try:
+            for _ in range(min(connections, pool.max_connections)):
+                opened.append(pool.checkout())
+        finally:
+            for connection in opened:
+                pool.checkin(connection)
+
+        with DatabaseConnection(pool) as db_connection:
+            db_connection.get_table_names()
+            TableBrowser(db_connection).get_tables()
+            for query in prime_queries:
+                query, params = query if isinstance(query, tuple) else (query, None)
+                db_connection.cached_query(query, params)
+
+        seconds = time.perf_counter() - start
+        metrics.record("warmup.seconds", seconds)
+        logging.info(f"Warm-up finished in {seconds:.1f}s")
+        future.set_result({"Seconds": seconds, "Connections": len(opened)})
+    except Exception as e:
+        logging.error(f"Error during warm-up: {e}")
+        with connection_pool_lock:
+            warmup_failed_at = time.monotonic()
+        future.set_exception(e)
+
+
+def wait_for_warmup(timeout=WARMUP_TIMEOUT):
+    """Wait for the warm-up started by start_warmup.
+
+    Returns False when it failed, timed out or was never started; callers then simply
+    connect on demand through the pool.
+    """
+    future = warmup_future
+    if future is None:
+        return False
+    try:
+        future.result(timeout)
+        return True
+    except Exception:
+        return False
+
+
 def main():
     db_connection = DatabaseConnection()
     try:
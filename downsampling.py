@@ -0,0 +1,124 @@
+# downsampling.py
+#
+# Reduces large datasets to about what a chart can show before they are drawn, so render time
+# depends on the chart's pixel size instead of the number of rows: lines keep the points that
+# preserve their shape (LTTB) and dense scatter plots become a grid of point counts.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DOWNSAMPLE_CACHE_ENTRIES = 64
+
+
+def lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets: keep max_points points that preserve a line's shape.
+
+    The first and last points are kept; every bucket in between keeps the point forming the
+    largest triangle with the point kept before it and the mean of the next bucket.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    point_count = len(x)
+    if max_points >= point_count or max_points < 3:
+        return x, y
+
+    # max_points - 2 buckets over the inner points, with their means from running sums
+    edges = np.linspace(1, point_count - 1, max_points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    sum_x = np.concatenate([[0.0], np.cumsum(x)])
+    sum_y = np.concatenate([[0.0], np.cumsum(y)])
+    mean_x = (sum_x[ends] - sum_x[starts]) / (ends - starts)
+    mean_y = (sum_y[ends] - sum_y[starts]) / (ends - starts)
+    # The last bucket looks ahead to the last point instead of a next bucket
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, point_count - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        bucket_x, bucket_y = x[start:end], y[start:end]
+        # Twice the triangle areas; the factor does not change the argmax
+        areas = np.abs((x[previous] - next_x[bucket]) * (bucket_y - y[previous])
+                       - (x[previous] - bucket_x) * (next_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+
+def get_edges(values, bins):
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+
+def bin_points(x, y, bins_x, bins_y):
+    """Count the points in each cell of a bins_x × bins_y grid over the data range.
+
+    Returns (counts of shape (bins_x, bins_y), x edges, y edges), like np.histogram2d, but
+    with one linear pass instead of a search per point.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if not len(x):
+        return np.zeros((bins_x, bins_y), dtype=np.int64), np.linspace(0, 1, bins_x + 1), np.linspace(0, 1, bins_y + 1)
+
+    x_edges, y_edges = get_edges(x, bins_x), get_edges(y, bins_y)
+    cell_x = ((x - x_edges[0]) * (bins_x / (x_edges[-1] - x_edges[0]))).astype(np.int64)
+    cell_y = ((y - y_edges[0]) * (bins_y / (y_edges[-1] - y_edges[0]))).astype(np.int64)
+    # The maximum falls exactly on the last edge; count it in the last cell
+    np.minimum(cell_x, bins_x - 1, out=cell_x)
+    np.minimum(cell_y, bins_y - 1, out=cell_y)
+
+    counts = np.bincount(cell_x * bins_y + cell_y, minlength=bins_x * bins_y)
+    return counts.reshape(bins_x, bins_y), x_edges, y_edges
+
+
+class DownsampleCache:
+    # Process-wide cache of downsampled datasets, keyed by the data fingerprint and the target
+    # size, so a dataset is only reduced again when it is drawn at a new size
+
+    def __init__(self, max_entries=DOWNSAMPLE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        result = compute()
+        with self.lock:
+            self.entries[key] = result
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Shared by every session of the Streamlit process
+downsample_cache = DownsampleCache()
+
+
+def downsample_line(data_key, x, y, max_points):
+    """LTTB-reduce a line to max_points, cached per dataset (`data_key`) and size."""
+    if len(x) <= max_points:
+        return x, y
+    return downsample_cache.get_or_compute(("line", data_key, max_points), lambda: lttb(x, y, max_points))
+
+
+def bin_scatter(data_key, x, y, bins_x, bins_y):
+    """Bin a scatter plot into a grid of point counts, cached per dataset (`data_key`) and size."""
+    return downsample_cache.get_or_compute(("scatter", data_key, bins_x, bins_y),
+                                           lambda: bin_points(x, y, bins_x, bins_y))
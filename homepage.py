@@ -1,6 +1,10 @@
 import streamlit as st
 from PIL import Image
 
+# Function to open the analyst dashboard from the login button
+def open_analyst_dashboard():
+    st.session_state.page = "analyst"
+
 # Function to show the first screen
 def show_homepage():
     # Create columns for layout to center content
@@ -28,9 +32,8 @@ def show_homepage():
 
         # Add the login button
         with select_col2:
-            if st.button("Login", use_container_width=True):
-                st.session_state.page = "analyst"
-                st.rerun()
+            # The page switches in the callback, before the rerun the click starts
+            st.button("Login", use_container_width=True, on_click=open_analyst_dashboard)
 
     # Add white space
     st.markdown("<br><br>", unsafe_allow_html=True)
@@ -2,24 +2,35 @@ import streamlit as st
 from homepage import show_homepage
 from analyst import show_analyst_dashboard
 from developer import show_developer_dashboard
-from layout import load_custom_css, add_footer, load_custom_font_graphs
+from layout import load_custom_css, add_footer, load_custom_font_graphs, track_rerun
+from db_viewer import start_warmup
 
 # Set the page title and layout
 st.set_page_config(page_title="Hudson Dashboard", layout="wide", page_icon="assets/images/logo--light.png")
 
-# Load custom CSS and fonts
-load_custom_css()
-load_custom_font_graphs()
+# Count and time every run of this script, to compare with the chart fragment reruns
+with track_rerun("script"):
+    # Warm up the tunnel, connection pool and schema cache in the background (once per process),
+    # so the homepage renders immediately and the first data page does not pay for it
+    start_warmup()
 
-# Initialize session state for page navigation
-if 'page' not in st.session_state:
-    st.session_state.page = 'home'
+    # Load custom CSS and fonts
+    load_custom_css()
+    load_custom_font_graphs()
 
-# Navigation logic
-if st.session_state.page == 'home':
-    show_homepage() # Show the homepage
-    add_footer()  # Add footer
-elif st.session_state.page == 'analyst':
-    show_analyst_dashboard() # Show the analyst dashboard
-elif st.session_state.page == 'developer':
-    show_developer_dashboard() # Show the developer dashboard
+    # Initialize session state for page navigation
+    if 'page' not in st.session_state:
+        st.session_state.page = 'home'
+
+    # Navigation logic
+    if st.session_state.page == 'home':
+        show_homepage() # Show the homepage
+        add_footer()  # Add footer
+    elif st.session_state.page == 'analyst':
+        show_analyst_dashboard() # Show the analyst dashboard
+    elif st.session_state.page == 'developer':
+        show_developer_dashboard() # Show the developer dashboard
+    elif st.session_state.page == 'tables':
+        # Imported here, so the other pages never load the database browser
+        from table_browser import show_table_browser
+        show_table_browser() # Show the table browser
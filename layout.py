@@ -1,8 +1,32 @@
 import streamlit as st
 import os
+from contextlib import contextmanager
 import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 from streamlit_option_menu import option_menu
+from metrics import metrics
+
+# Opties van de navigatiebalk en de pagina die elke optie opent
+NAVBAR_PAGES = {
+    "Homepage": 'home',
+    "Analyst Dashboard": 'analyst',
+    "Developer Dashboard": 'developer',
+    "Table Browser": 'tables'
+}
+
+# Functie om een run van het hele script of van een fragment te tellen en te timen
+@contextmanager
+def track_rerun(kind):
+    """Count a run of the script or a fragment for this session, and time it in the metrics."""
+    counts = st.session_state.setdefault('rerun_counts', {})
+    counts[kind] = counts.get(kind, 0) + 1
+    with metrics.timer(f"rerun.{kind}_seconds"):
+        yield
+
+# Callback van de navigatiebalk: de pagina wisselt vóór de rerun die de klik start,
+# zodat de nieuwe pagina in diezelfde rerun getekend wordt in plaats van in een tweede
+def change_page(key):
+    st.session_state.page = NAVBAR_PAGES[st.session_state[key]]
 
 # Functie om aangepaste lettertypen voor grafieken te laden
 def load_custom_font_graphs():
@@ -73,31 +97,18 @@ def add_navbar():
                             }
                     </style>""", unsafe_allow_html=True)
 
-    selected = option_menu(
+    option_menu(
         menu_title=None,
-        options=["Homepage", "Analyst Dashboard", "Developer Dashboard"],
-        icons=["house", "bar-chart", "bar-chart"],
-        default_index=1,
+        options=list(NAVBAR_PAGES),
+        icons=["house", "bar-chart", "bar-chart", "table"],
+        default_index=list(NAVBAR_PAGES.values()).index(st.session_state.page),
         orientation="horizontal",
         styles={
             "container": {"max-width": "none!important","border-radius":"0rem","padding": "0!important", "background-color": "#608099"},
             "icon": {"color": "white"},
             "nav-link": {"font-size": "16px", "color": "white", "font-family": "Moneta"},
             "nav-link-selected": {"background-color": "transparent", "color": "white", "font-family": "Moneta"},
-        }
+        },
+        key='navbar',
+        on_change=change_page
     )
-
-    # Update de sessietoestand op basis van de geselecteerde optie
-    if selected == "Homepage" and st.session_state.page != 'home':
-        st.session_state.page = 'home'
-        st.rerun()
-
-    # Update de sessietoestand op basis van de geselecteerde optie
-    if selected == "Analyst Dashboard" and st.session_state.page != 'analyst':
-        st.session_state.page = 'analyst'
-        st.rerun()
-
-    # Update de sessietoestand op basis van de geselecteerde optie
-    elif selected == "Developer Dashboard" and st.session_state.page != 'developer':
-        st.session_state.page = 'developer'
-        st.rerun()
@@ -0,0 +1,161 @@
+# metrics.py
+#
+# Rolling histograms of the data path timings and sizes (tunnel setup, connection checkout,
+# query execution, rows and bytes fetched, decoding), shared by every session of the process.
+# Values go into log-spaced buckets (four per power of two) kept per time slot, so recording
+# is O(1), memory is fixed, and old slots simply drop out of the window.
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+METRICS_SLOT_SECONDS = 60  # Width of one time slot
+METRICS_WINDOW_SLOTS = 15  # Slots kept, so the histograms cover the last 15 minutes
+
+# Each range [2**exponent, 2**(exponent + 1)) is split into SUB_BUCKETS equal buckets, which
+# keeps quantiles within about 10%; the exponents cover microseconds to terabytes
+MIN_EXPONENT = -20
+MAX_EXPONENT = 40
+SUB_BUCKETS = 4
+BUCKET_COUNT = (MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS + 1  # Plus one bucket for zero and below
+
+
+def get_bucket(value):
+    if value <= 0:
+        return 0
+    mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    exponent -= 1
+    if exponent < MIN_EXPONENT:
+        return 1
+    if exponent > MAX_EXPONENT:
+        return BUCKET_COUNT - 1
+    sub_bucket = int((mantissa * 2 - 1) * SUB_BUCKETS)
+    return (exponent - MIN_EXPONENT) * SUB_BUCKETS + sub_bucket + 1
+
+
+def get_bucket_bounds(bucket):
+    if bucket == 0:
+        return 0.0, 0.0
+    exponent, sub_bucket = divmod(bucket - 1, SUB_BUCKETS)
+    scale = 2.0 ** (exponent + MIN_EXPONENT)
+    return scale * (1 + sub_bucket / SUB_BUCKETS), scale * (1 + (sub_bucket + 1) / SUB_BUCKETS)
+
+
+class RollingHistogram:
+    """Histogram of the values recorded in the last `window_slots` time slots."""
+
+    def __init__(self, slot_seconds=METRICS_SLOT_SECONDS, window_slots=METRICS_WINDOW_SLOTS):
+        self.slot_seconds = slot_seconds
+        self.window_slots = window_slots
+        self.slots = deque()  # [slot number, bucket counts, count, sum, min, max], oldest first
+        self.lock = threading.Lock()
+
+    def record(self, value, now=None):
+        slot_number = int((now if now is not None else time.time()) // self.slot_seconds)
+        with self.lock:
+            if not self.slots or self.slots[-1][0] != slot_number:
+                self.slots.append([slot_number, [0] * BUCKET_COUNT, 0, 0.0, value, value])
+                self.drop_old_slots(slot_number)
+            slot = self.slots[-1]
+            slot[1][get_bucket(value)] += 1
+            slot[2] += 1
+            slot[3] += value
+            slot[4] = min(slot[4], value)
+            slot[5] = max(slot[5], value)
+
+    def drop_old_slots(self, slot_number):
+        while self.slots and self.slots[0][0] <= slot_number - self.window_slots:
+            self.slots.popleft()
+
+    def snapshot(self, now=None):
+        """Merge the slots of the window into counts, sum, min, max and bucket quantiles."""
+        slot_number = int((now if now is not None else time.time()) // self.slot_seconds)
+        with self.lock:
+            self.drop_old_slots(slot_number)
+            buckets = [0] * BUCKET_COUNT
+            count, total, minimum, maximum = 0, 0.0, None, None
+            for _, slot_buckets, slot_count, slot_sum, slot_min, slot_max in self.slots:
+                for bucket, bucket_count in enumerate(slot_buckets):
+                    buckets[bucket] += bucket_count
+                count += slot_count
+                total += slot_sum
+                minimum = slot_min if minimum is None else min(minimum, slot_min)
+                maximum = slot_max if maximum is None else max(maximum, slot_max)
+
+        summary = {"Count": count, "Sum": total, "Mean": total / count if count else None,
+                   "Min": minimum, "Max": maximum}
+        for name, quantile in (("P50", 0.5), ("P95", 0.95), ("P99", 0.99)):
+            summary[name] = self.get_quantile(buckets, count, quantile, minimum, maximum)
+        summary["Buckets"] = {get_bucket_bounds(bucket)[0]: bucket_count
+                              for bucket, bucket_count in enumerate(buckets) if bucket_count}
+        return summary
+
+    def get_quantile(self, buckets, count, quantile, minimum, maximum):
+        # Geometric middle of the bucket holding the quantile, clamped to the observed range
+        if not count:
+            return None
+        target = quantile * count
+        cumulative = 0
+        for bucket, bucket_count in enumerate(buckets):
+            cumulative += bucket_count
+            if cumulative >= target and bucket_count:
+                lower, upper = get_bucket_bounds(bucket)
+                return min(max(math.sqrt(lower * upper), minimum), maximum)
+        return maximum
+
+
+class MetricsRegistry:
+    """Named rolling histograms, created on first use."""
+
+    def __init__(self, slot_seconds=METRICS_SLOT_SECONDS, window_slots=METRICS_WINDOW_SLOTS):
+        self.slot_seconds = slot_seconds
+        self.window_slots = window_slots
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def get_histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, RollingHistogram(self.slot_seconds, self.window_slots))
+        return histogram
+
+    def record(self, name, value):
+        self.get_histogram(name).record(value)
+
+    @contextmanager
+    def timer(self, name):
+        """Record the seconds spent in a with-block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Return {metric name: summary} for every metric, sorted by name."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+        return {name: histogram.snapshot() for name, histogram in histograms}
+
+    def export_jsonl(self):
+        """Return the current snapshot as JSON lines, one metric per line."""
+        timestamp = datetime.now(timezone.utc).isoformat()
+        window_seconds = self.slot_seconds * self.window_slots
+        lines = [json.dumps({"timestamp": timestamp, "window_seconds": window_seconds, "metric": name,
+                             **{key: value for key, value in summary.items() if key != "Buckets"},
+                             "buckets": [[lower, count] for lower, count in summary["Buckets"].items()]})
+                 for name, summary in self.snapshot().items()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+# Shared by every session of the Streamlit process
+metrics = MetricsRegistry()
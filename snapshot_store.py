@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import logging
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Directory holding the local table snapshots
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'snapshots')
+
+# Table and column names are interpolated into SQL, so only plain identifiers are accepted
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+
+
+def quote_identifier(name):
+    """Quote a (schema.)table or column name for SQL Server."""
+    if not IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name}")
+    return '.'.join(f"[{part}]" for part in name.split('.'))
+
+
+def encode_watermark(value):
+    """Store a watermark value in the JSON manifest, keeping its type."""
+    if value is None:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return {"type": "datetime", "value": pd.Timestamp(value).isoformat()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    return {"type": "number" if isinstance(value, (int, float)) else "text", "value": value}
+
+
+def decode_watermark(stored):
+    """Turn a manifest watermark back into a query parameter."""
+    if stored is None:
+        return None
+    if stored["type"] == "datetime":
+        return pd.Timestamp(stored["value"]).to_pydatetime()
+    return stored["value"]
+
+
+class SnapshotStore:
+    """Local on-disk mirror of SQL tables, refreshed incrementally by a watermark column.
+
+    Each refresh only pulls the rows whose watermark column (a modified date or identity)
+    is greater than the last synced value and appends them as a new segment. Decoded
+    assessment results can be stored next to the raw rows of the same segment.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self.lock = threading.Lock()  # Serializes refresh and compact
+        # Readers do not take the lock, which is held for a whole refresh; compact waits for them
+        # before deleting the segments they may still be reading
+        self.active_readers = 0
+        self.readers_condition = threading.Condition()
+
+    def table_dir(self, table):
+        quote_identifier(table)
+        return os.path.join(self.root, table)
+
+    def manifest_path(self, table):
+        return os.path.join(self.table_dir(table), "manifest.json")
+
+    def load_manifest(self, table):
+        try:
+            with open(self.manifest_path(table)) as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return None
+
+    def save_manifest(self, table, manifest):
+        # Write to a temporary file first, so readers never see a half-written manifest
+        path = self.manifest_path(table)
+        with open(path + ".tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def refresh(self, db_connection, table, watermark_column, key_columns, columns=None, decode=None):
+        """Pull the rows changed since the last sync and store them as a new segment.
+
+        `db_connection` is an open DatabaseConnection. `key_columns` identify a row, so a row
+        that changed again replaces its older copy when the snapshot is read. `decode`
+        optionally turns a chunk of raw rows into decoded results (for example with
+        parse_all_candidates) indexed by the row key. Returns the number of rows pulled.
+        """
+        with self.lock:
+            os.makedirs(self.table_dir(table), exist_ok=True)
+            manifest = self.load_manifest(table) or {
+                "table": table,
+                "watermark_column": watermark_column,
+                "key_columns": list(key_columns),
+                "watermark": None,
+                "next_segment": 0,
+                "segments": []
+            }
+            if manifest["watermark_column"] != watermark_column:
+                raise ValueError(f"Snapshot of {table} uses watermark column {manifest['watermark_column']}.")
+
+            select_list = ', '.join(quote_identifier(column) for column in columns) if columns else '*'
+            query = f"SELECT {select_list} FROM {quote_identifier(table)}"
+            watermark = decode_watermark(manifest["watermark"])
+            params = None
+            if watermark is not None:
+                query += f" WHERE {quote_identifier(watermark_column)} > ?"
+                params = (watermark,)
+            query += f" ORDER BY {quote_identifier(watermark_column)}"
+
+            row_count = 0
+            for chunk in db_connection.iter_query(query, params):
+                decoded_rows = decode(chunk) if decode is not None else None
+                manifest["segments"].append(self.write_segment(table, manifest, chunk, decoded_rows))
+                manifest["watermark"] = encode_watermark(chunk[watermark_column].max())
+                row_count += len(chunk)
+
+            self.save_manifest(table, manifest)
+            logging.info(f"Snapshot of {table} refreshed with {row_count} rows")
+            return row_count
+
+    def write_segment(self, table, manifest, rows, decoded_rows=None):
+        """Write the rows (and decoded results) of one segment and return its manifest entry."""
+        segment_number = manifest["next_segment"]
+        manifest["next_segment"] += 1
+
+        segment = {"rows": f"rows-{segment_number:06d}.pkl", "row_count": len(rows)}
+        rows.to_pickle(os.path.join(self.table_dir(table), segment["rows"]))
+        if decoded_rows is not None:
+            segment["decoded"] = f"decoded-{segment_number:06d}.pkl"
+            decoded_rows.to_pickle(os.path.join(self.table_dir(table), segment["decoded"]))
+        return segment
+
+    def read(self, table, decoded=False):
+        """Read a table snapshot, keeping only the newest copy of each row."""
+        # Register before loading the manifest, so compact keeps every segment it lists
+        with self.readers_condition:
+            self.active_readers += 1
+        try:
+            manifest = self.load_manifest(table)
+            if manifest is None:
+                raise FileNotFoundError(f"No snapshot of {table} in {self.root}.")
+
+            kind = "decoded" if decoded else "rows"
+            frames = [pd.read_pickle(os.path.join(self.table_dir(table), segment[kind]))
+                      for segment in manifest["segments"] if kind in segment]
+        finally:
+            with self.readers_condition:
+                self.active_readers -= 1
+                self.readers_condition.notify_all()
+
+        if not frames:
+            return pd.DataFrame()
+
+        if decoded:
+            return self.drop_replaced_keys(frames)
+
+        snapshot = pd.concat(frames, ignore_index=True)
+        return snapshot.drop_duplicates(subset=manifest["key_columns"], keep='last', ignore_index=True)
+
+    def drop_replaced_keys(self, frames):
+        """Drop decoded rows whose key (first index level) was decoded again in a later segment."""
+        kept = []
+        newer_keys = pd.Index([])
+        for frame in reversed(frames):
+            keys = frame.index.get_level_values(0)
+            kept.append(frame[~keys.isin(newer_keys)])
+            newer_keys = newer_keys.append(keys.unique())
+        return pd.concat(reversed(kept))
+
+    def compact(self, table):
+        """Rewrite a snapshot as a single segment without replaced rows."""
+        with self.lock:
+            manifest = self.load_manifest(table)
+            if manifest is None or len(manifest["segments"]) <= 1:
+                return
+
+            has_decoded = all("decoded" in segment for segment in manifest["segments"])
+            rows = self.read(table)
+            decoded_rows = self.read(table, decoded=True) if has_decoded else None
+
+            old_segments = manifest["segments"]
+            manifest["segments"] = [self.write_segment(table, manifest, rows, decoded_rows)]
+            self.save_manifest(table, manifest)
+
+            # Readers that loaded the old manifest may still open its segments; new readers see
+            # the compacted one. Holding the condition keeps readers out until the files are gone.
+            with self.readers_condition:
+                while self.active_readers:
+                    self.readers_condition.wait()
+                for old_segment in old_segments:
+                    for kind in ("rows", "decoded"):
+                        if kind in old_segment:
+                            os.remove(os.path.join(self.table_dir(table), old_segment[kind]))
@@ -0,0 +1,236 @@
+# summary_stats.py
+#
+# Summary statistics (count, mean, variance, min, max and quantiles) computed in a single pass
+# over the data. Moments are kept with Welford's algorithm, combined per block of values, so
+# partial results of separate chunks merge exactly; quantiles come from one partition of data
+# in memory, or from a mergeable sketch when the data is streamed in chunks.
+#
+# A summary of empty data has None for every statistic but Count; format_statistic shows it.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+STATS_BLOCK_VALUES = 65536  # Values folded into the running moments at a time
+SKETCH_SIZE = 2048  # Samples kept per sketch level; rank error is well below 1% at this size
+SUMMARY_CACHE_ENTRIES = 64
+SUMMARY_QUANTILES = (0.25, 0.5, 0.75)
+
+# Rows of the statistics shown next to a chart: (label, summary key)
+STATISTICS_ROWS = [("Mean", "Mean"), ("Median", "Median"), ("Std Dev", "StdDev"), ("Minimum", "Min"),
+                   ("Maximum", "Max"), ("Variance", "Variance"), ("IQR", "IQR")]
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded memory.
+
+    Samples are kept in levels, where a sample at level i stands for 2**i values. A level that
+    grows past `size` is sorted and every other sample moves up one level.
+    """
+
+    def __init__(self, size=SKETCH_SIZE, seed=0):
+        self.size = size
+        self.levels = []
+        self.rng = np.random.default_rng(seed)  # Fixed seed, so the same data gives the same sketch
+
+    def update(self, values):
+        self.add(0, np.asarray(values, dtype=np.float64))
+
+    def add(self, level, values):
+        while len(values):
+            # Another sketch's levels may skip empty ones, so grow up to the level being added
+            while level >= len(self.levels):
+                self.levels.append(np.empty(0))
+            merged = np.concatenate([self.levels[level], values])
+            if len(merged) <= self.size:
+                self.levels[level] = merged
+                return
+
+            merged.sort()
+            # An odd sample out stays at this level, the rest is halved into the next one
+            self.levels[level] = merged[len(merged) - len(merged) % 2:]
+            values = merged[self.rng.integers(2):len(merged) - len(merged) % 2:2]
+            level += 1
+
+    def merge(self, other):
+        for level, values in enumerate(other.levels):
+            self.add(level, values)
+
+    def quantile(self, q):
+        if not self.levels:
+            return None
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(samples), 2.0 ** level) for level, samples in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1])
+        return float(values[order[min(position, len(order) - 1)]])
+
+
+class SummaryStats:
+    """Running count, mean, variance, min, max and quantiles of a stream of values.
+
+    Missing values (NaN) are skipped. Two summaries of separate chunks merge into the summary of
+    both; exact quantiles are only available when all values were summarized at once, after a
+    merge the sketch is used. With `sketch_size=None` no sketch is kept, for data that is
+    summarized at once and never merged.
+    """
+
+    def __init__(self, sketch_size=SKETCH_SIZE):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+        self.minimum = None
+        self.maximum = None
+        self.sketch = QuantileSketch(sketch_size) if sketch_size else None
+        self.exact_quantiles = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        for start in range(0, len(values), STATS_BLOCK_VALUES):
+            block = values[start:start + STATS_BLOCK_VALUES]
+            block_mean = float(block.mean())
+            deviations = block - block_mean
+            self.add_moments(len(block), block_mean, float(np.dot(deviations, deviations)),
+                             float(block.min()), float(block.max()))
+            if self.sketch is not None:
+                self.sketch.update(block)
+        self.exact_quantiles = None
+        return self
+
+    def add_moments(self, count, mean, m2, minimum, maximum):
+        # Welford's update, generalized to a block of values (Chan et al.)
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+
+    def merge(self, other):
+        if other.count and (self.sketch is None or other.sketch is None):
+            raise ValueError("Only summaries with a sketch can be merged; use summarize(values, mergeable=True).")
+        self.add_moments(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        if other.count:
+            self.sketch.merge(other.sketch)
+        self.exact_quantiles = None
+        return self
+
+    @property
+    def variance(self):
+        # Population variance, like np.var
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def std(self):
+        return self.variance ** 0.5 if self.count else None
+
+    def quantile(self, q):
+        if self.exact_quantiles is not None and q in self.exact_quantiles:
+            return self.exact_quantiles[q]
+        return self.sketch.quantile(q) if self.sketch is not None else None
+
+    def summary(self):
+        q1, median, q3 = (self.quantile(q) for q in SUMMARY_QUANTILES)
+        return {
+            "Count": self.count,
+            "Mean": self.mean if self.count else None,
+            "Median": median,
+            "StdDev": self.std,
+            "Variance": self.variance,
+            "Min": self.minimum,
+            "Max": self.maximum,
+            "Q1": q1,
+            "Q3": q3,
+            "IQR": q3 - q1 if q1 is not None and q3 is not None else None
+        }
+
+
+def get_exact_quantiles(values, quantiles=SUMMARY_QUANTILES):
+    # Linear interpolation like np.percentile, but with one partition for all quantiles
+    positions = [q * (len(values) - 1) for q in quantiles]
+    indices = sorted({index for position in positions for index in (int(position), min(int(position) + 1, len(values) - 1))})
+    partitioned = np.partition(values, indices)
+    result = {}
+    for q, position in zip(quantiles, positions):
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        result[q] = float(partitioned[lower] + (partitioned[upper] - partitioned[lower]) * (position - lower))
+    return result
+
+
+def summarize(values, mergeable=False):
+    """Summarize values that are in memory, with exact quantiles.
+
+    The quantile sketch is only filled when the summary will be merged with others.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[~np.isnan(values)]
+    stats = SummaryStats(SKETCH_SIZE if mergeable else None).update(values)
+    if len(values):
+        stats.exact_quantiles = get_exact_quantiles(values)
+    return stats
+
+
+def summarize_chunks(chunks):
+    """Summarize values arriving in chunks, e.g. a column of DatabaseConnection.iter_query.
+
+    Only one chunk is in memory at a time; quantiles come from the sketch.
+    """
+    stats = SummaryStats()
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+
+class SummaryCache:
+    # Process-wide cache of summaries, keyed by a fingerprint of the summarized data
+
+    def __init__(self, max_entries=SUMMARY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        result = compute()
+        with self.lock:
+            self.entries[key] = result
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"Hits": self.hits, "Misses": self.misses, "Entries": len(self.entries)}
+
+
+# Shared by every session of the Streamlit process
+summary_cache = SummaryCache()
+
+
+def get_summary(data_key, values):
+    """Summary dict of values in memory, cached per dataset (`data_key`)."""
+    return summary_cache.get_or_compute(data_key, lambda: summarize(values).summary())
+
+
+def format_statistic(value):
+    # Statistics of empty data are None
+    return "-" if value is None else f"{value:.2f}"
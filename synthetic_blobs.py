@@ -0,0 +1,244 @@
+# synthetic_blobs.py
+#
+# Synthetic answer blobs for every binary format, and a SQLite database seeded with them for
+# running the data path offline:
+#
+#   python synthetic_blobs.py --sqlite hudson.sqlite --candidates 10000 --items 100
+#   DB_BACKEND=sqlite SQLITE_PATH=hudson.sqlite streamlit run hudson-dashboard.py
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from BinaryParsers import (
+    BinaryBaqHelper,
+    BinaryFcaHelper,
+    BinaryMdqRegulationHelper,
+    BinaryPaq2018Helper,
+    BinaryRatHelper,
+    BinarySjtHelper,
+)
+
+# Test code used for the synthetic RAT and NRAT blobs
+SYNTHETIC_TEST_ID = "SYN"
+
+# Number of distinct PAQ2018 statements drawn from, so statements repeat like in real tests
+PAQ2018_STATEMENT_POOL = 240
+
+
+def encode_items(layout, fields, item_count):
+    # Inverse of compile_layout: pack the field values of every item into the layout's words
+    word_bits = layout.word_size * 8
+    words_per_item = layout.item_size // layout.word_size
+    word_mask = np.uint64((1 << word_bits) - 1)
+    words = np.zeros((item_count, words_per_item), dtype=np.uint64)
+
+    for field in layout.fields:
+        # Missing fields are zero; single-value fields become one column
+        values = np.asarray(fields.get(field.name, 0), dtype=np.uint64)
+        if values.ndim:
+            values = values.reshape(item_count, field.count)
+        values = np.broadcast_to(values, (item_count, field.count))
+        mask = np.uint64((1 << field.width) - 1)
+        stride = field.stride or field.width
+
+        for idx in range(field.count):
+            word, offset = divmod(field.word * word_bits + field.offset + idx * stride, word_bits)
+            value = values[:, idx] & mask
+
+            if layout.bit_order == 'lsb':
+                words[:, word] |= (value << np.uint64(offset)) & word_mask
+                if offset + field.width > word_bits:
+                    words[:, word + 1] |= value >> np.uint64(word_bits - offset)
+            else:
+                shift = word_bits - offset - field.width
+                if shift >= 0:
+                    words[:, word] |= (value << np.uint64(shift)) & word_mask
+                else:
+                    words[:, word] |= value >> np.uint64(-shift)
+                    words[:, word + 1] |= (value << np.uint64(word_bits + shift)) & word_mask
+
+    byteorder = '<' if layout.byteorder == 'little' else '>'
+    return words.astype(f"{byteorder}u{layout.word_size}").tobytes()
+
+
+def get_sequence_ids(rng, item_count):
+    # Every item shows its three options in a random order
+    return np.argsort(rng.random((item_count, 3)), axis=1) + 1
+
+
+def get_statement_codes(rng, count):
+    # Three letters, a two-digit number and an optional trailing letter (bits 0-26)
+    letters = rng.integers(1, 27, size=(count, 3))
+    numeric = rng.integers(1, 100, size=count)
+    suffix = np.where(rng.random(count) < 0.2, rng.integers(1, 27, size=count), 0)
+    return letters[:, 0] | (letters[:, 1] << 5) | (letters[:, 2] << 10) | (numeric << 15) | (suffix << 22)
+
+
+def generate_paq2018_fields(rng, item_count):
+    pool = get_statement_codes(rng, PAQ2018_STATEMENT_POOL)
+    return {
+        "LeftStatement": rng.choice(pool, size=item_count),
+        "RightStatement": rng.choice(pool, size=item_count),
+        "IsInversed": rng.integers(0, 2, size=item_count),
+        "Answer": rng.integers(1, 6, size=item_count)
+    }
+
+
+def generate_fca_fields(rng, item_count):
+    competency_ids = rng.integers(1, 1024, size=(item_count, 4))
+    # Most items score on one or two competencies only
+    competency_ids[rng.random((item_count, 4)) < 0.6] = 0
+    fields = {
+        "ItemId": rng.integers(1, 1 << 20, size=item_count),
+        "SequenceIds": get_sequence_ids(rng, item_count),
+        "Answers": rng.integers(1, 4, size=(item_count, 3)),
+        "CompetencyIds": competency_ids,
+        "TimeSpent": rng.integers(1, 1 << 14, size=item_count)
+    }
+    for slot in range(1, 5):
+        fields[f"CorrectAnswers{slot}"] = rng.integers(1, 4, size=(item_count, 3))
+    return fields
+
+
+def generate_baq_fields(rng, item_count):
+    item_ids = np.arange(item_count) % 63 + 1
+    return {
+        "ItemId": item_ids,
+        "IpsativeItemId": item_ids,
+        "NormativeValues": rng.integers(0, 16, size=(item_count, 5)),
+        "IpsativeValues": rng.integers(0, 16, size=(item_count, 5))
+    }
+
+
+def generate_sjt_fields(rng, item_count):
+    return {
+        "SituationId": rng.integers(1, 1 << 20, size=item_count),
+        "SequenceIds": get_sequence_ids(rng, item_count),
+        "Answers": rng.integers(1, 4, size=(item_count, 3)),
+        "Scores": rng.integers(0, 8, size=(item_count, 3)),
+        "TimeSpent": rng.integers(1, 1 << 14, size=item_count)
+    }
+
+
+def generate_rat_fields(rng, item_count):
+    # A test has a few dozen screens with a handful of clones and items each
+    return {
+        "ScreenId": rng.integers(1, 50, size=item_count),
+        "CloneId": rng.integers(0, 3, size=item_count),
+        "ItemId": rng.integers(1, 7, size=item_count),
+        "Answer": rng.integers(1, 5, size=item_count),
+        "CorrectAnswer": rng.integers(1, 5, size=item_count),
+        "TimeSpent": rng.integers(1, 1 << 12, size=item_count),
+        "IsAnswered": rng.random(item_count) < 0.95
+    }
+
+
+def generate_nrat_fields(rng, item_count):
+    fields = generate_rat_fields(rng, item_count)
+    fields["ItemCloneId"] = rng.integers(0, 3, size=item_count)
+    return fields
+
+
+def generate_mdq_regulation_fields(rng, item_count):
+    return {
+        "ItemId": np.arange(item_count) % 63 + 1,
+        "NormativeValues": rng.integers(0, 8, size=(item_count, 6)),
+        "IpsativeValues": rng.integers(0, 8, size=(item_count, 6))
+    }
+
+
+# Format name -> (helper factory, field generator, whether the format ends with an empty item)
+FORMATS = {
+    "PAQ2018": (BinaryPaq2018Helper, generate_paq2018_fields, False),
+    "FCA": (BinaryFcaHelper, generate_fca_fields, True),
+    "BAQ": (BinaryBaqHelper, generate_baq_fields, False),
+    "SJT": (BinarySjtHelper, generate_sjt_fields, True),
+    "RAT": (lambda answers: BinaryRatHelper(SYNTHETIC_TEST_ID, answers), generate_rat_fields, True),
+    "NRAT": (lambda answers: BinaryRatHelper(SYNTHETIC_TEST_ID, answers, is_nrat=True), generate_nrat_fields, True),
+    "MDQ_REGULATION": (BinaryMdqRegulationHelper, generate_mdq_regulation_fields, True),
+}
+
+
+def make_helper(format_name, answers):
+    return FORMATS[format_name][0](answers)
+
+
+def generate_blob(format_name, item_count, seed=0, padding_items=1):
+    """Generate a valid answers blob with `item_count` answered items.
+
+    Formats with a termination condition get `padding_items` empty items appended, like the
+    unused tail of a real answers buffer. The same seed always gives the same blob.
+    """
+    make_format_helper, generate_fields, has_terminator = FORMATS[format_name]
+    layout = make_format_helper(b"").LAYOUT
+    rng = np.random.default_rng(seed)
+
+    blob = encode_items(layout, generate_fields(rng, item_count), item_count)
+    if has_terminator:
+        blob += bytes(layout.item_size * padding_items)
+    return blob
+
+
+def generate_blobs(format_name, candidate_count, items_per_candidate, seed=0):
+    # One blob per candidate, each with its own seed so candidates differ
+    return [generate_blob(format_name, items_per_candidate, seed=seed + idx) for idx in range(candidate_count)]
+
+
+def create_synthetic_database(path, candidate_count=1000, items_per_candidate=100, formats=None, seed=0):
+    """Create a SQLite database with synthetic Candidates and Answers tables.
+
+    Answers holds one blob per candidate and format, keyed by (CandidateId, Format), with a
+    ModifiedAt column to refresh snapshots by. An existing file at `path` is replaced.
+    """
+    formats = formats or list(FORMATS)
+    if os.path.exists(path):
+        os.remove(path)
+
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(
+            "CREATE TABLE Candidates (CandidateId INTEGER PRIMARY KEY, TestDate TEXT NOT NULL, "
+            "ModifiedAt TEXT NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE Answers (CandidateId INTEGER NOT NULL, Format TEXT NOT NULL, TestId TEXT, "
+            "AnswerBlob BLOB NOT NULL, ModifiedAt TEXT NOT NULL, PRIMARY KEY (CandidateId, Format))"
+        )
+        connection.execute("CREATE INDEX IX_Answers_ModifiedAt ON Answers (ModifiedAt)")
+
+        for candidate_id in range(1, candidate_count + 1):
+            tested_at = start + timedelta(minutes=int(rng.integers(0, 365 * 24 * 60)))
+            connection.execute("INSERT INTO Candidates VALUES (?, ?, ?)",
+                               (candidate_id, tested_at.date().isoformat(), tested_at.isoformat()))
+            connection.executemany("INSERT INTO Answers VALUES (?, ?, ?, ?, ?)", [
+                (candidate_id, format_name, SYNTHETIC_TEST_ID if format_name in ("RAT", "NRAT") else None,
+                 generate_blob(format_name, items_per_candidate, seed=seed + candidate_id * len(FORMATS) + idx),
+                 tested_at.isoformat())
+                for idx, format_name in enumerate(formats)
+            ])
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create a SQLite database with synthetic answer blobs.")
+    parser.add_argument("--sqlite", required=True, help="Path of the database file to create.")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=100, help="Items per answer blob.")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    create_synthetic_database(args.sqlite, args.candidates, args.items, args.formats, args.seed)
+    print(f"Created {args.sqlite} with {args.candidates} candidates and {len(args.formats)} formats")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import streamlit as st
+from layout import add_navbar
+from db_viewer import (DatabaseConnection, TableBrowser, FILTER_OPERATORS, NULL_OPERATORS, BROWSER_PAGE_SIZE,
+                       wait_for_warmup)
+
+PAGE_SIZES = [50, BROWSER_PAGE_SIZE, 500, 1000]
+
+
+# Function to start again at the first page, after the table, filters or page size changed
+def reset_pages():
+    # The `after` key of every page visited so far; the first page starts at None
+    st.session_state.browser_keys = [None]
+
+
+def clear_filters():
+    st.session_state.browser_filters = []
+    reset_pages()
+
+
+def go_to_next_page(next_key):
+    st.session_state.browser_keys.append(next_key)
+
+
+def go_to_previous_page():
+    if len(st.session_state.browser_keys) > 1:
+        st.session_state.browser_keys.pop()
+
+
+# Function to format a table option with its estimated row count
+def format_table(tables, table_name):
+    row_estimate = tables.loc[tables["TableName"] == table_name, "RowEstimate"].iloc[0]
+    if row_estimate is None or row_estimate != row_estimate:  # Missing or NaN
+        return table_name
+    return f"{table_name} (~{int(row_estimate):,} rows)"
+
+
+# Sidebar form to add server-side column filters
+def show_filter_sidebar(column_names):
+    st.sidebar.markdown("## Filters")
+    with st.sidebar.form("browser_filter_form", clear_on_submit=True):
+        column = st.selectbox("Column", column_names)
+        operator = st.selectbox("Operator", FILTER_OPERATORS)
+        value = st.text_input("Value", help="Use % as wildcard with LIKE.")
+        if st.form_submit_button("Add filter"):
+            st.session_state.browser_filters.append((column, operator, None if operator in NULL_OPERATORS else value))
+            reset_pages()
+
+    for column, operator, value in st.session_state.browser_filters:
+        st.sidebar.write(f"`{column} {operator}{'' if value is None else ' ' + repr(value)}`")
+    if st.session_state.browser_filters:
+        st.sidebar.button("Clear filters", on_click=clear_filters)
+
+
+# Table browser page
+def show_table_browser():
+    # Add the navigation bar
+    add_navbar()
+
+    # Page title
+    st.markdown("<h1>Table Browser</h1>", unsafe_allow_html=True)
+
+    if 'browser_keys' not in st.session_state:
+        reset_pages()
+    if 'browser_filters' not in st.session_state:
+        st.session_state.browser_filters = []
+
+    # Use the warmed-up pool and schema cache instead of connecting on our own
+    with st.spinner("Connecting to the database..."):
+        wait_for_warmup()
+
+    try:
+        with DatabaseConnection.pooled() as db_connection:
+            browser = TableBrowser(db_connection)
+            tables = browser.get_tables()
+            if tables.empty:
+                st.info("No tables found.")
+                return
+
+            # Sidebar table options; changing the table clears the filters and paging
+            st.sidebar.markdown("## Choose a table")
+            table = st.sidebar.selectbox(
+                "Select a table:",
+                options=list(tables["TableName"]),
+                format_func=lambda table_name: format_table(tables, table_name),
+                key='browser_table',
+                on_change=clear_filters
+            )
+            page_size = st.sidebar.selectbox("Rows per page:", PAGE_SIZES, index=PAGE_SIZES.index(BROWSER_PAGE_SIZE),
+                                             key='browser_page_size', on_change=reset_pages)
+
+            column_names = list(browser.get_columns(table)["COLUMN_NAME"])
+            key_columns = tables.loc[tables["TableName"] == table, "KeyColumns"].iloc[0]
+            if not key_columns:
+                st.warning(f"{table} has no primary key. Choose columns that are unique together to page by.")
+                key_columns = st.multiselect("Key columns:", column_names, key='browser_key_columns',
+                                             on_change=reset_pages)
+                if not key_columns:
+                    return
+
+            show_filter_sidebar(column_names)
+
+            page_number = len(st.session_state.browser_keys)
+            page = browser.fetch_page(
+                table,
+                after=st.session_state.browser_keys[-1],
+                page_size=page_size,
+                filters=st.session_state.browser_filters,
+                key_columns=key_columns
+            )
+    except Exception as e:
+        st.error(f"Er is een fout opgetreden bij het ophalen van de tabel: {e}")
+        return
+
+    st.dataframe(page.rows, hide_index=True)
+
+    # Page navigation
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("Previous page", on_click=go_to_previous_page, disabled=page_number == 1)
+    with col2:
+        st.write(f"Page {page_number} · ordered by {', '.join(key_columns)}")
+    with col3:
+        st.button("Next page", on_click=go_to_next_page, args=(page.next_key,), disabled=page.next_key is None)
+
+
+if __name__ == "__main__":
+    show_table_browser()
@@ -0,0 +1,34 @@
+import numpy as np
+
+from summary_stats import SummaryStats, summarize, summarize_chunks
+
+
+def check_merged(merged, values):
+    summary = merged.summary()
+    assert summary["Count"] == len(values)
+    assert np.isclose(summary["Mean"], values.mean())
+    assert np.isclose(summary["Variance"], values.var())
+    assert summary["Min"] == values.min() and summary["Max"] == values.max()
+    # The sketch keeps the median within a small rank error
+    assert abs(np.searchsorted(np.sort(values), summary["Median"]) / len(values) - 0.5) < 0.02
+
+
+def test_merge_summaries_of_different_sizes_in_both_directions():
+    small, large = np.arange(10.0), np.arange(10000.0)
+    values = np.concatenate([small, large])
+    check_merged(SummaryStats().update(small).merge(SummaryStats().update(large)), values)
+    check_merged(SummaryStats().update(large).merge(SummaryStats().update(small)), values)
+
+
+def test_merge_mergeable_in_memory_summaries():
+    values = np.random.default_rng(0).normal(size=100000)
+    first, rest = values[:1000], values[1000:]
+    check_merged(summarize(first, mergeable=True).merge(summarize(rest, mergeable=True)), values)
+    check_merged(summarize(rest, mergeable=True).merge(summarize(first, mergeable=True)), values)
+    check_merged(summarize_chunks(np.array_split(values, 7)), values)
+
+
+def test_summary_of_empty_data():
+    summary = summarize([]).summary()
+    assert summary["Count"] == 0
+    assert all(value is None for name, value in summary.items() if name != "Count")